@@ -279,7 +279,7 @@ def run_local(task_text):
             # If Docker is not accessible and this is a container query, provide diagnostic info
             if docker_diagnosis["root_causes"]:
                 logger.warning("[LOCAL] Docker access issues detected, providing diagnostic information")
-                container_info = get_container_information()
+                container_info = get_container_information(docker_diagnosis["analysis"])
                 
                 diagnostic_response = {
                     "message": "Docker access issue detected in container",
@@ -4,32 +4,124 @@ Statistics Logger for Performance Analytics
 Tracks response times, routing decisions, and performance metrics
 """
 
+import atexit
+import bisect
+import heapq
 import json
+import mmap
+import os
+import queue
+import statistics
 import time
 import threading
-from datetime import datetime, timedelta
 from pathlib import Path
 from collections import defaultdict, deque
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+# Static recommendation text for _generate_optimization_recommendations
+_MODEL_TUNING_TIPS = (
+    "🔧 Consider optimizing OpenHermes model settings:",
+    "   • Reduce n_ctx if using large context windows",
+    "   • Decrease max_tokens for faster responses",
+    "   • Optimize n_threads for your CPU",
+)
+_LONG_QUERY_TIP = "📝 Long queries detected - consider query preprocessing"
+_CHUNKING_TIP = "⏰ Some queries exceed 60s - implement query chunking"
+_NETWORK_TIPS = (
+    "🌐 Network/SSH latency may be contributing to slow responses",
+    "   • Check SSH connection stability",
+    "   • Consider connection pooling",
+)
+_ALL_GOOD_TIP = "✅ Dev machine performance is within acceptable ranges"
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps_line(entry):
+    """Serialize one stats entry to a newline-terminated JSONL record (bytes)"""
+    if orjson is not None:
+        return orjson.dumps(entry) + b"\n"
+    return (json.dumps(entry) + "\n").encode("utf-8")
+
+
+class _EventQueue(queue.Queue):
+    """Bounded producer -> consumer queue that can shed its oldest expendable event"""
+    
+    def evict(self):
+        """Drop the oldest queued event, sparing query starts while anything else is queued
+        
+        Evicting a start would orphan its completion, so starts only go when
+        the queue holds nothing else. Returns False if the queue was empty.
+        """
+        with self.mutex:
+            if not self.queue:
+                return False
+            for i, (kind, _) in enumerate(self.queue):
+                if kind != "start":
+                    del self.queue[i]
+                    break
+            else:
+                self.queue.popleft()
+            self.not_full.notify()
+            return True
+
+
 class StatsLogger:
-    """Thread-safe statistics logger for tracking query performance"""
+    """Thread-safe statistics logger for tracking query performance
+
+    Request threads never touch the query buffer directly: they push events
+    onto a bounded queue and return. A single consumer thread owns
+    ``recent_queries`` and the stats file, and publishes an immutable
+    snapshot of completed queries that the read-side methods use. If the
+    consumer falls behind, the oldest queued events are dropped rather than
+    blocking the request path.
+    """
+    
+    QUEUE_MAXSIZE = 10000
+    FLUSH_BYTES = 64 * 1024  # write + fsync once this much is buffered...
+    FLUSH_INTERVAL = 0.05  # ...or once the oldest buffered record is this old (seconds)
+    ROTATE_BYTES = 16 * 1024 * 1024  # roll performance_stats.jsonl over to .1 past this size
+    CACHE_TTL = 1.5  # absorb dashboard polling bursts (seconds)
+    CACHE_MIN_AGE = 0.5  # staleness tolerated after new queries land (seconds)
     
     def __init__(self, memory_dir=None):
         self.memory_dir = Path(memory_dir or Path(__file__).parent / "agent_memory")
         self.memory_dir.mkdir(exist_ok=True)
         self.stats_file = self.memory_dir / "performance_stats.jsonl"
-        self.lock = threading.Lock()
         
-        # In-memory stats for quick access (last 1000 entries)
+        # In-memory stats for quick access (last 1000 entries) - consumer thread only
         self.recent_queries = deque(maxlen=1000)
         self.session_start = time.time()
         
+        # Producer -> consumer handoff and the published read-side view
+        self._events = _EventQueue(maxsize=self.QUEUE_MAXSIZE)
+        self._flush_waiters = deque()  # kept off the bounded queue so eviction never drops them
+        self._snapshot = ()
+        self._dropped = 0
+        self._fd = None  # long-lived append descriptor, owned by the consumer
+        self._cache = {}  # (getter, hours) -> (monotonic time, snapshot, result)
+        
         # Enhanced performance thresholds for optimization analysis
         self.pi_timeout = 30  # Pi should respond quickly
         self.dev_timeout = 120  # Dev machine timeout
         self.pi_target = 5  # Target response time for Pi (seconds)
         self.dev_target = 15  # Target response time for dev machine (seconds)
         
+        # Upper bounds (exclusive) per category; anything past the last bound gets the final label
+        self._category_tables = {
+            "local": ((5, 15, self.pi_timeout),
+                      ("excellent", "good", "acceptable", "slow")),
+            "dev": ((10, 30, 60, self.dev_timeout),
+                    ("excellent", "good", "acceptable", "slow", "timeout_risk")),
+        }
+        
         # Performance tracking for optimization
         self.slow_queries = deque(maxlen=100)  # Track slow queries for analysis
         self.timeout_queries = deque(maxlen=50)  # Track timeouts
@@ -37,10 +129,60 @@ class StatsLogger:
         # Load historical data
         self._load_historical_data()
         
+        self._consumer = threading.Thread(target=self._consume, name="stats-consumer", daemon=True)
+        self._consumer.start()
+        # The consumer is a daemon thread; drain queued and buffered records before exit
+        atexit.register(self.flush)
+        
     def _load_historical_data(self):
-        """Load any existing historical data"""
-        # For now, just initialize - could load from persistent storage later
-        pass
+        """Replay the tail of the stats file into recent_queries
+        
+        Right after a rotation the current file holds only a few records, so
+        the rest of the in-memory window is filled from the tail of the
+        rotated ``.1`` file.
+        """
+        limit = self.recent_queries.maxlen
+        records = self._read_tail(self.stats_file, limit)
+        if len(records) < limit:
+            rotated = self.stats_file.with_name(self.stats_file.name + ".1")
+            records += self._read_tail(rotated, limit - len(records))
+        
+        self.recent_queries.extend(e for e in reversed(records) if "duration" in e)
+        self._snapshot = tuple(self.recent_queries)
+    
+    @staticmethod
+    def _read_tail(path, limit):
+        """Return up to limit records from the end of a JSONL file, newest first
+        
+        The file is memory-mapped and scanned backwards for newlines, so only
+        the records that fit in the in-memory window are ever parsed; the
+        rest of the file is never copied into Python objects.
+        """
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return []
+        
+        records = []
+        try:
+            if os.fstat(fd).st_size == 0:
+                return records
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                end = len(mm)
+                while end > 0 and len(records) < limit:
+                    start = mm.rfind(b"\n", 0, end - 1) + 1
+                    line = mm[start:end].strip()
+                    if line:
+                        try:
+                            records.append(_loads(line))
+                        except ValueError:
+                            pass  # torn write at the end of a previous run
+                    end = start
+        except (OSError, ValueError) as e:
+            print(f"Failed to load historical stats: {e}")
+        finally:
+            os.close(fd)
+        return records
         
     def log_query_start(self, query_id, query_text, expected_destination):
         """Log the start of a query processing"""
@@ -48,87 +190,191 @@ class StatsLogger:
             "query_id": query_id,
             "query_text": query_text,
             "expected_destination": expected_destination,
-            "start_time": time.time(),
-            "timestamp": datetime.now().isoformat()
+            "start_time": time.time()
         }
         
-        with self.lock:
-            self.recent_queries.append(entry)
+        # The consumer fills in the buffered entry later; the caller keeps its own dict
+        self._enqueue(("start", dict(entry)))
         
         return entry
     
     def log_query_complete(self, query_id, actual_destination, response_length, success=True, error_msg=None):
-        """Log the completion of a query processing"""
-        end_time = time.time()
-        
-        with self.lock:
-            # Find the matching start entry
-            start_entry = None
-            for entry in reversed(self.recent_queries):
-                if entry.get("query_id") == query_id and "duration" not in entry:
-                    start_entry = entry
-                    break
+        """Log the completion of a query processing
+        
+        The match against the start entry happens on the consumer thread, so
+        this returns the completion record that was queued, not the merged entry.
+        """
+        completion = {
+            "query_id": query_id,
+            "actual_destination": actual_destination,
+            "end_time": time.time(),
+            "response_length": response_length,
+            "success": success,
+            "error_msg": error_msg
+        }
+        
+        self._enqueue(("complete", completion))
+        
+        return completion
+    
+    def _enqueue(self, event):
+        """Queue an event without ever blocking the caller, evicting an older one when full"""
+        while True:
+            try:
+                self._events.put_nowait(event)
+                return
+            except queue.Full:
+                if self._events.evict():
+                    self._dropped += 1
+    
+    @property
+    def dropped_count(self):
+        """Number of events discarded because the consumer could not keep up"""
+        return self._dropped
+    
+    def flush(self, timeout=5):
+        """Block until every event queued before this call has been processed and synced"""
+        done = threading.Event()
+        self._flush_waiters.append(done)
+        try:
+            self._events.put_nowait(("wake", None))
+        except queue.Full:
+            pass  # the consumer has work queued and checks for waiters on its next pass
+        return done.wait(timeout)
+    
+    def _consume(self):
+        """Consumer loop: drain queued events, update the buffer, batch writes, publish"""
+        pending = bytearray()
+        pending_since = 0.0
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, pending_since + self.FLUSH_INTERVAL - time.monotonic())
+            try:
+                batch = [self._events.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            # Every event queued before these waiters registered is reached by the drain below
+            waiters = []
+            while self._flush_waiters:
+                waiters.append(self._flush_waiters.popleft())
+            try:
+                while True:
+                    batch.append(self._events.get_nowait())
+            except queue.Empty:
+                pass
             
-            if start_entry:
-                duration = end_time - start_entry["start_time"]
-                
-                # Update the entry with completion data
-                start_entry.update({
-                    "actual_destination": actual_destination,
-                    "duration": duration,
-                    "response_length": response_length,
-                    "success": success,
-                    "error_msg": error_msg,
-                    "completed_at": datetime.now().isoformat(),
-                    "performance_category": self._categorize_performance(duration, actual_destination)
-                })
+            completed = []
+            try:
+                for kind, payload in batch:
+                    if kind == "start":
+                        self.recent_queries.append(payload)
+                    elif kind == "complete":
+                        entry = self._apply_completion(payload)
+                        if entry:
+                            completed.append(entry)
                 
-                # Write to persistent log
-                self._write_to_file(start_entry)
+                if completed:
+                    if not pending:
+                        pending_since = time.monotonic()
+                    pending += self._serialize(completed)
+                    self._snapshot = tuple(e for e in self.recent_queries if "duration" in e)
                 
-                return start_entry
+                # Write to persistent log once per 64 KiB / 50 ms, or when someone is waiting on it
+                if pending and (waiters or len(pending) >= self.FLUSH_BYTES
+                                or time.monotonic() - pending_since >= self.FLUSH_INTERVAL):
+                    self._write_to_file(pending)
+                    pending.clear()
+            except Exception as e:
+                print(f"Stats consumer error: {e}")
+            finally:
+                for waiter in waiters:
+                    waiter.set()
+    
+    def _apply_completion(self, completion):
+        """Merge a completion record into its matching start entry (consumer thread only)"""
+        query_id = completion["query_id"]
+        end_time = completion["end_time"]
+        
+        # Find the matching start entry
+        for entry in reversed(self.recent_queries):
+            if entry.get("query_id") == query_id and "duration" not in entry:
+                duration = end_time - entry["start_time"]
+                entry.update((k, v) for k, v in completion.items() if k not in ("query_id", "end_time"))
+                entry["duration"] = duration
+                entry["performance_category"] = self._categorize_performance(duration, completion["actual_destination"])
+                return entry
         
         return None
     
     def _categorize_performance(self, duration, destination):
         """Categorize performance based on destination and duration"""
-        if destination == "local":
-            if duration < 5:
-                return "excellent"
-            elif duration < 15:
-                return "good"
-            elif duration < self.pi_timeout:
-                return "acceptable"
-            else:
-                return "slow"
-        else:  # dev machine
-            if duration < 10:
-                return "excellent"
-            elif duration < 30:
-                return "good"  
-            elif duration < 60:
-                return "acceptable"
-            elif duration < self.dev_timeout:
-                return "slow"
-            else:
-                return "timeout_risk"
+        bounds, labels = self._category_tables["local" if destination == "local" else "dev"]
+        return labels[bisect.bisect_right(bounds, duration)]
+    
+    def _serialize(self, entries):
+        """Serialize completed entries to JSONL bytes
+        
+        Wall-clock strings are derived here from the epoch floats, so the
+        request threads never format timestamps themselves.
+        """
+        for entry in entries:
+            entry["timestamp"] = time.strftime(ISO_FORMAT, time.gmtime(entry["start_time"]))
+            entry["completed_at"] = time.strftime(ISO_FORMAT, time.gmtime(entry["start_time"] + entry["duration"]))
+        return b"".join(_dumps_line(entry) for entry in entries)
     
-    def _write_to_file(self, entry):
-        """Write entry to persistent log file"""
+    def _write_to_file(self, data):
+        """Append a batch of records with one write and one fsync, rotating large files"""
         try:
-            with open(self.stats_file, "a") as f:
-                f.write(json.dumps(entry) + "\n")
-        except Exception as e:
+            if self._fd is None:
+                self._fd = os.open(self.stats_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+            os.fsync(self._fd)
+            
+            if os.fstat(self._fd).st_size >= self.ROTATE_BYTES:
+                os.close(self._fd)
+                self._fd = None
+                os.replace(self.stats_file, self.stats_file.with_name(self.stats_file.name + ".1"))
+        except OSError as e:
             print(f"Failed to write stats: {e}")
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+    
+    def _cache_lookup(self, key, snap):
+        """Return a cached getter result if it is fresh enough, else None
+        
+        Results live for CACHE_TTL seconds; once new queries have been
+        published they are only reused while younger than CACHE_MIN_AGE.
+        """
+        hit = self._cache.get(key)
+        if hit is None:
+            return None
+        stored_at, seen_snap, result = hit
+        age = time.monotonic() - stored_at
+        if age < self.CACHE_TTL and (seen_snap is snap or age < self.CACHE_MIN_AGE):
+            return result
+        return None
+    
+    def _cache_store(self, key, snap, result):
+        """Remember a getter result computed from the given snapshot"""
+        self._cache[key] = (time.monotonic(), snap, result)
+        return result
     
     def get_recent_stats(self, hours=24):
         """Get statistics for recent queries"""
+        key = ("recent_stats", hours)
+        snap = self._snapshot
+        cached = self._cache_lookup(key, snap)
+        if cached is not None:
+            return cached
+        
         cutoff_time = time.time() - (hours * 3600)
         
-        with self.lock:
-            # Filter recent queries
-            recent = [entry for entry in self.recent_queries 
-                     if entry.get("start_time", 0) > cutoff_time and "duration" in entry]
+        # Filter recent queries from the consumer's published snapshot
+        recent = [entry for entry in snap if entry.get("start_time", 0) > cutoff_time]
         
         if not recent:
             return self._empty_stats()
@@ -144,7 +390,8 @@ class StatsLogger:
                 "local_queries": len(local_queries),
                 "dev_queries": len(dev_queries),
                 "success_rate": sum(1 for q in recent if q.get("success", False)) / total_queries * 100,
-                "session_uptime": time.time() - self.session_start
+                "session_uptime": time.time() - self.session_start,
+                "dropped_count": self._dropped
             },
             "performance": {
                 "local": self._calculate_performance_stats(local_queries),
@@ -155,7 +402,7 @@ class StatsLogger:
             "recent_queries": recent[-10:]  # Last 10 queries for debugging
         }
         
-        return stats
+        return self._cache_store(key, snap, stats)
     
     def _calculate_performance_stats(self, queries):
         """Calculate performance statistics for a set of queries"""
@@ -163,14 +410,13 @@ class StatsLogger:
             return {"count": 0, "avg_duration": 0, "min_duration": 0, "max_duration": 0, "median_duration": 0}
         
         durations = [q["duration"] for q in queries if "duration" in q]
-        durations.sort()
         
         return {
             "count": len(queries),
             "avg_duration": sum(durations) / len(durations),
             "min_duration": min(durations),
             "max_duration": max(durations),
-            "median_duration": durations[len(durations)//2] if durations else 0,
+            "median_duration": statistics.median(durations) if durations else 0,
             "success_rate": sum(1 for q in queries if q.get("success", False)) / len(queries) * 100
         }
     
@@ -201,7 +447,8 @@ class StatsLogger:
     def _empty_stats(self):
         """Return empty stats structure"""
         return {
-            "summary": {"total_queries": 0, "local_queries": 0, "dev_queries": 0, "success_rate": 0, "session_uptime": 0},
+            "summary": {"total_queries": 0, "local_queries": 0, "dev_queries": 0, "success_rate": 0, "session_uptime": 0,
+                        "dropped_count": self._dropped},
             "performance": {"local": {"count": 0}, "dev": {"count": 0}},
             "routing_accuracy": {"total": 0, "correct": 0, "accuracy": 0},
             "performance_distribution": {},
@@ -230,13 +477,17 @@ class StatsLogger:
     
     def analyze_dev_machine_performance(self, hours=24):
         """Analyze dev machine performance bottlenecks"""
+        key = ("dev_analysis", hours)
+        snap = self._snapshot
+        cached = self._cache_lookup(key, snap)
+        if cached is not None:
+            return cached
+        
         cutoff_time = time.time() - (hours * 3600)
         
-        with self.lock:
-            dev_queries = [entry for entry in self.recent_queries 
-                          if (entry.get("start_time", 0) > cutoff_time and 
-                              entry.get("actual_destination") == "dev" and 
-                              "duration" in entry)]
+        dev_queries = [entry for entry in snap
+                      if (entry.get("start_time", 0) > cutoff_time and
+                          entry.get("actual_destination") == "dev")]
         
         if not dev_queries:
             return {"error": "No dev machine queries in the specified time range"}
@@ -249,7 +500,7 @@ class StatsLogger:
         analysis = {
             "total_dev_queries": len(dev_queries),
             "avg_response_time": sum(durations) / len(durations),
-            "median_response_time": sorted(durations)[len(durations)//2],
+            "median_response_time": statistics.median(durations),
             "max_response_time": max(durations),
             "min_response_time": min(durations),
             "slow_queries_count": len(slow_queries),
@@ -262,10 +513,10 @@ class StatsLogger:
                 "timeout_risk": len([q for q in dev_queries if q.get("performance_category") == "timeout_risk"])
             },
             "optimization_recommendations": self._generate_optimization_recommendations(dev_queries),
-            "slowest_queries": sorted(dev_queries, key=lambda x: x["duration"], reverse=True)[:5]
+            "slowest_queries": heapq.nlargest(5, dev_queries, key=lambda q: q["duration"])
         }
         
-        return analysis
+        return self._cache_store(key, snap, analysis)
     
     def _generate_optimization_recommendations(self, dev_queries):
         """Generate optimization recommendations based on performance data"""
@@ -274,44 +525,55 @@ class StatsLogger:
         if not dev_queries:
             return ["No data available for recommendations"]
         
-        avg_duration = sum(q["duration"] for q in dev_queries) / len(dev_queries)
-        slow_queries = [q for q in dev_queries if q["duration"] > self.dev_target]
-        
-        if avg_duration > self.dev_target:
-            recommendations.append(f"⚠️  Average dev machine response time ({avg_duration:.1f}s) exceeds target ({self.dev_target}s)")
-        
-        if len(slow_queries) > len(dev_queries) * 0.3:  # More than 30% slow
-            recommendations.append("🔧 Consider optimizing OpenHermes model settings:")
-            recommendations.append("   • Reduce n_ctx if using large context windows")
-            recommendations.append("   • Decrease max_tokens for faster responses")
-            recommendations.append("   • Optimize n_threads for your CPU")
-        
-        long_queries = [q for q in dev_queries if len(q.get("query", "")) > 200]
-        if long_queries:
-            recommendations.append("📝 Long queries detected - consider query preprocessing")
-        
-        if any(q["duration"] > 60 for q in dev_queries):
-            recommendations.append("⏰ Some queries exceed 60s - implement query chunking")
+        # One pass over the data collects every counter the rules below need
+        total = 0.0
+        n_slow = n_long = n_over_60 = n_over_45 = 0
+        dev_target = self.dev_target
+        for q in dev_queries:
+            duration = q["duration"]
+            total += duration
+            if duration > dev_target:
+                n_slow += 1
+            if duration > 45:
+                n_over_45 += 1
+                if duration > 60:
+                    n_over_60 += 1
+            if len(q.get("query_text", "")) > 200:
+                n_long += 1
+        avg_duration = total / len(dev_queries)
+        
+        if avg_duration > dev_target:
+            recommendations.append(f"⚠️  Average dev machine response time ({avg_duration:.1f}s) exceeds target ({dev_target}s)")
+        
+        if n_slow > len(dev_queries) * 0.3:  # More than 30% slow
+            recommendations.extend(_MODEL_TUNING_TIPS)
+        
+        if n_long:
+            recommendations.append(_LONG_QUERY_TIP)
+        
+        if n_over_60:
+            recommendations.append(_CHUNKING_TIP)
         
         # SSH/network analysis
-        ssh_slow = [q for q in dev_queries if q["duration"] > 45]
-        if len(ssh_slow) > 0:
-            recommendations.append("🌐 Network/SSH latency may be contributing to slow responses")
-            recommendations.append("   • Check SSH connection stability")
-            recommendations.append("   • Consider connection pooling")
+        if n_over_45:
+            recommendations.extend(_NETWORK_TIPS)
         
         if not recommendations:
-            recommendations.append("✅ Dev machine performance is within acceptable ranges")
+            recommendations.append(_ALL_GOOD_TIP)
         
         return recommendations
     
     def get_performance_insights(self, hours=24):
         """Get comprehensive performance insights for dashboard"""
+        key = ("insights", hours)
+        snap = self._snapshot
+        cached = self._cache_lookup(key, snap)
+        if cached is not None:
+            return cached
+        
         cutoff_time = time.time() - (hours * 3600)
         
-        with self.lock:
-            recent = [entry for entry in self.recent_queries 
-                     if entry.get("start_time", 0) > cutoff_time and "duration" in entry]
+        recent = [entry for entry in snap if entry.get("start_time", 0) > cutoff_time]
         
         if not recent:
             return {"error": "No data available"}
@@ -343,7 +605,7 @@ class StatsLogger:
                 insights["efficiency_comparison"]["dev_avg"]
             )
         
-        return insights
+        return self._cache_store(key, snap, insights)
     
     def _calculate_performance_trends(self, queries):
         """Calculate performance trends over time"""
@@ -0,0 +1,38 @@
+"""
+Shared 'ip -j' cache for the diagnostic tasks.
+
+The heartbeat and configuration discovery both need the interface list.
+Within one process they share a single 'ip -j <object>' run per TTL
+window instead of each spawning ip on every cycle.
+"""
+import json
+import subprocess
+import threading
+import time
+
+DEFAULT_TTL = 5  # seconds
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def get_ip_json(obj='address', ttl=DEFAULT_TTL):
+    """Parsed 'ip -j <obj>' output, reused for ttl seconds
+
+    Returns a list of interface dicts, or None if ip is missing, fails or
+    cannot emit JSON (failures are cached for the same ttl).
+    """
+    with _lock:
+        now = time.monotonic()
+        cached = _cache.get(obj)
+        if cached and cached[0] > now:
+            return cached[1]
+        try:
+            result = subprocess.run(['ip', '-j', obj], capture_output=True, text=True, timeout=10)
+            parsed = json.loads(result.stdout) if result.returncode == 0 else None
+        except (OSError, subprocess.TimeoutExpired, ValueError):
+            parsed = None
+        if not isinstance(parsed, list):
+            parsed = None
+        _cache[obj] = (now + ttl, parsed)
+        return parsed
@@ -0,0 +1,93 @@
+"""
+Shared ICMP reachability check for the diagnostic tasks.
+
+Several tasks ping gateways, peers and public resolvers. They all go through
+ping_hosts: icmplib in-process when installed, else one fping run for every
+host, else one ping process per host.
+"""
+import asyncio
+import shutil
+
+try:
+    from icmplib import async_multiping
+except ImportError:
+    async_multiping = None
+
+
+async def _run(argv, timeout):
+    """Run argv under the event loop; returns success/stdout/stderr like the tasks' run_command"""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+    except OSError as e:
+        return {'success': False, 'error': str(e), 'stdout': '', 'stderr': ''}
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return {'success': False, 'error': 'Command timeout', 'stdout': '', 'stderr': ''}
+    return {
+        'success': proc.returncode == 0,
+        'stdout': stdout.decode(errors='replace').strip(),
+        'stderr': stderr.decode(errors='replace').strip(),
+        'returncode': proc.returncode
+    }
+
+
+def _parse_fping_summary(stderr, hosts):
+    """Per-host results from 'fping -q' summary lines ('host : xmt/rcv/%loss = 2/2/0%, ...')"""
+    lines = {}
+    for line in stderr.splitlines():
+        host, sep, _ = line.partition(' : ')
+        if sep:
+            lines[host.strip()] = line
+    parsed = {}
+    for host in hosts:
+        line = lines.get(host, '')
+        counts = line.split('=', 1)[1].split('/') if '=' in line else []
+        received = int(counts[1]) if len(counts) > 1 and counts[1].strip().isdigit() else 0
+        parsed[host] = {'success': received > 0, 'stdout': line if received else '', 'stderr': '' if received else line}
+    return parsed
+
+
+async def ping_hosts(hosts, count=2, timeout=3):
+    """Ping every host at once: icmplib in-process, else one fping, else one ping per host
+
+    Returns {host: result} where each result has success/stdout/stderr keys.
+    """
+    hosts = list(hosts)
+    if not hosts:
+        return {}
+
+    if async_multiping is not None:
+        try:
+            replies = await async_multiping(hosts, count=count, timeout=timeout, privileged=False)
+        except Exception:
+            replies = None  # unprivileged ICMP not allowed for this user
+        if replies is not None:
+            return {
+                target: {
+                    'success': host.is_alive,
+                    'stdout': f"{host.address}: {host.packets_received}/{host.packets_sent} received, avg {host.avg_rtt:.1f} ms" if host.is_alive else '',
+                    'stderr': '' if host.is_alive else f"{host.address}: no reply"
+                }
+                for target, host in zip(hosts, replies)
+            }
+
+    if shutil.which('fping'):
+        # fping exits non-zero when any host is down; the summary lines carry the per-host result
+        result = await _run(['fping', '-q', '-c', str(count), '-t', str(timeout * 1000), *hosts],
+                            timeout=timeout * count + 5)
+        return _parse_fping_summary(result['stderr'], hosts)
+
+    results = await asyncio.gather(
+        *(_run(['ping', '-c', str(count), '-W', str(timeout), host], timeout=timeout * count + 5) for host in hosts)
+    )
+    return dict(zip(hosts, results))
+
+
+def host_reachable(host, count=2, timeout=3):
+    """Blocking single-host form of ping_hosts, for callers outside an event loop"""
+    return asyncio.run(ping_hosts([host], count, timeout))[host]['success']
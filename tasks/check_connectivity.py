@@ -10,8 +10,7 @@ Hardware Requirements:
 
 Package Requirements:
 - Python 3.6+
-- Standard library only (socket, subprocess, json, os, time)
-- Optional: iputils-ping package for ping command
+- Standard library only (socket, select, threading, json, os, time)
 - Optional: psutil for enhanced system monitoring
 
 System Dependencies:
@@ -20,56 +19,112 @@ System Dependencies:
 - Socket support in kernel
 - /proc filesystem for system information access
 """
+import errno
 import json
-import subprocess
+import select
 import socket
+import threading
 import time
 import os
-import shutil
 
-PING_TARGET = "1.1.1.1"
+INTERNET_TARGET = ("1.1.1.1", 53)
 SSH_HOST = os.getenv("SSH_HOST", "your-pi-hostname.local")
 SSH_PORT = 2222
+PROBE_TIMEOUT = 3
+OUTPUT_PATH = '/app/agent_memory/connectivity.json'
 
-# Check internet connectivity with ping (with fallback if ping not available)
-internet_ok = False
-try:
-    # First check if ping command exists
-    ping_cmd = shutil.which("ping")
-    if ping_cmd:
-        ping_result = subprocess.run([
-            ping_cmd, "-c", "1", PING_TARGET
-        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
-        internet_ok = ping_result.returncode == 0
-    else:
-        # Fallback: try to connect to a reliable service
+
+def _resolve_all(targets, deadline):
+    """IPv4 sockaddr per (host, port) target; None where it was not resolved by deadline
+
+    Numeric addresses are parsed in place. Names are looked up at the same
+    time on daemon threads, so a stalled resolver counts against the probe
+    timeout and one slow name does not delay the other target.
+    """
+    addrs = [None] * len(targets)
+    workers = []
+    for i, (host, port) in enumerate(targets):
         try:
-            with socket.create_connection(("8.8.8.8", 53), timeout=3):
-                internet_ok = True
-        except Exception:
-            internet_ok = False
-except (subprocess.TimeoutExpired, FileNotFoundError, Exception):
-    # Fallback: try to connect to a reliable service
+            addrs[i] = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM, 0, socket.AI_NUMERICHOST)[0][4]
+            continue
+        except socket.gaierror:
+            pass
+
+        def lookup(i=i, host=host, port=port):
+            try:
+                addrs[i] = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)[0][4]
+            except OSError:
+                pass
+
+        worker = threading.Thread(target=lookup, name="connectivity-resolve", daemon=True)
+        worker.start()
+        workers.append(worker)
+
+    for worker in workers:
+        worker.join(max(0.0, deadline - time.monotonic()))
+    return list(addrs)  # copy, so a lookup finishing after the deadline is ignored
+
+
+def _start_connect(addr):
+    """Begin a non-blocking TCP connect; returns the socket or None if it failed immediately"""
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.setblocking(False)
+    err = s.connect_ex(addr)
+    if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+        s.close()
+        return None
+    return s
+
+
+def probe_both(timeout=PROBE_TIMEOUT):
+    """Probe internet and SSH tunnel concurrently; returns (internet_ok, ssh_ok)"""
+    # One deadline covers name resolution as well as the connects
+    deadline = time.monotonic() + timeout
+    keys = ("internet", "ssh")
+    addrs = _resolve_all((INTERNET_TARGET, (SSH_HOST, SSH_PORT)), deadline)
+    pending = {}
+    for key, addr in zip(keys, addrs):
+        s = _start_connect(addr) if addr is not None else None
+        if s is not None:
+            pending[s] = key
+
+    results = dict.fromkeys(keys, False)
+    try:
+        while pending:
+            # Always poll at least once, so a connect that already completed is
+            # counted even if resolving the other target used up the timeout
+            remaining = max(0.0, deadline - time.monotonic())
+            _, writable, _ = select.select([], list(pending), [], remaining)
+            for s in writable:
+                results[pending.pop(s)] = s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+                s.close()
+            if remaining == 0:
+                break
+    finally:
+        for s in pending:
+            s.close()
+    return results["internet"], results["ssh"]
+
+
+def run() -> dict:
+    """Probe connectivity and write the result to agent memory"""
+    internet_ok, ssh_ok = probe_both()
+
+    output = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "internet_reachable": internet_ok,
+        "ssh_tunnel_open": ssh_ok,
+    }
+
+    os.makedirs('/app/agent_memory', exist_ok=True)
+    # Machine-read file: serialize compactly and hand it to the kernel in one write()
+    fd = os.open(OUTPUT_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
     try:
-        with socket.create_connection(("8.8.8.8", 53), timeout=3):
-            internet_ok = True
-    except Exception:
-        internet_ok = False
-
-# Attempt to open SSH tunnel port
-ssh_ok = False
-try:
-    with socket.create_connection((SSH_HOST, SSH_PORT), timeout=3):
-        ssh_ok = True
-except Exception:
-    ssh_ok = False
-
-output = {
-    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-    "internet_reachable": internet_ok,
-    "ssh_tunnel_open": ssh_ok,
-}
-
-os.makedirs('/app/agent_memory', exist_ok=True)
-with open('/app/agent_memory/connectivity.json', 'w') as f:
-    json.dump(output, f, indent=2)
+        os.write(fd, json.dumps(output, separators=(",", ":")).encode())
+    finally:
+        os.close(fd)
+    return output
+
+
+if __name__ == "__main__":
+    run()
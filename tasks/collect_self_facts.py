@@ -13,6 +13,7 @@ Package Requirements:
 - Standard library: socket, os, time, json
 - Optional: psutil for enhanced memory/CPU statistics
 - Fallback to /proc filesystem parsing if psutil unavailable
+  (set DA_NO_PSUTIL=1 to skip the psutil import entirely on slow hosts)
 
 System Dependencies:
 - /proc filesystem mounted (Linux systems)
@@ -23,63 +24,85 @@ System Dependencies:
 import json
 import socket
 import os
+import re
 import time
 
+# Imported once per process; the long-lived runner reuses it on every tick
+psutil = None
+if os.getenv("DA_NO_PSUTIL") != "1":
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+# Only the four fields the fallback needs; MemFree/Buffers/Cached approximate "available"
+MEMINFO_RE = re.compile(r"^(MemTotal|MemFree|Buffers|Cached):\s+(\d+)", re.M)
+OUTPUT_PATH = '/app/agent_memory/system_facts.json'
+
+
+def _memory_info():
+    """Memory totals from psutil, falling back to /proc/meminfo"""
+    if psutil is not None:
+        try:
+            vm = psutil.virtual_memory()
+            return {
+                "total": vm.total,
+                "available": vm.available,
+                "percent": vm.percent,
+            }
+        except Exception:
+            pass
 
-# Gather hostname
-hostname = socket.gethostname()
-
-# Determine IP address
-try:
-    ip_address = socket.gethostbyname(hostname)
-except Exception:
-    ip_address = "unknown"
-
-# Get memory usage
-mem_info = {}
-try:
-    import psutil
-    vm = psutil.virtual_memory()
-    mem_info = {
-        "total": vm.total,
-        "available": vm.available,
-        "percent": vm.percent,
-    }
-except Exception:
     # Fallback to /proc/meminfo parsing
-    info = {}
     try:
         with open("/proc/meminfo") as f:
-            for line in f:
-                parts = line.split()
-                if len(parts) >= 2:
-                    key = parts[0].rstrip(":")
-                    value = int(parts[1]) * 1024
-                    info[key] = value
-        total = info.get("MemTotal", 0)
-        free = info.get("MemFree", 0) + info.get("Buffers", 0) + info.get("Cached", 0)
-        mem_info = {
-            "total": total,
-            "available": free,
-            "percent": round((total - free) / total * 100, 2) if total else 0,
-        }
+            data = f.read()
     except FileNotFoundError:
-        mem_info = {}
-
-# CPU load (1 minute average)
-try:
-    load1, _, _ = os.getloadavg()
-except OSError:
-    load1 = 0.0
-
-output = {
-    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-    "hostname": hostname,
-    "ip_address": ip_address,
-    "memory": mem_info,
-    "cpu_load_1min": load1,
-}
-
-os.makedirs('/app/agent_memory', exist_ok=True)
-with open('/app/agent_memory/system_facts.json', 'w') as f:
-    json.dump(output, f, indent=2)
+        return {}
+    info = {k: int(v) * 1024 for k, v in MEMINFO_RE.findall(data)}
+    total = info.get("MemTotal", 0)
+    free = info.get("MemFree", 0) + info.get("Buffers", 0) + info.get("Cached", 0)
+    return {
+        "total": total,
+        "available": free,
+        "percent": round((total - free) / total * 100, 2) if total else 0,
+    }
+
+
+def run() -> dict:
+    """Collect system facts and write them to agent memory"""
+    # Gather hostname
+    hostname = socket.gethostname()
+
+    # Determine IP address
+    try:
+        ip_address = socket.gethostbyname(hostname)
+    except Exception:
+        ip_address = "unknown"
+
+    # CPU load (1 minute average)
+    try:
+        load1, _, _ = os.getloadavg()
+    except OSError:
+        load1 = 0.0
+
+    output = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "hostname": hostname,
+        "ip_address": ip_address,
+        "memory": _memory_info(),
+        "cpu_load_1min": load1,
+    }
+
+    os.makedirs('/app/agent_memory', exist_ok=True)
+    # Machine-read file: serialize compactly and hand it to the kernel in one write()
+    fd = os.open(OUTPUT_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, json.dumps(output, separators=(",", ":")).encode())
+    finally:
+        os.close(fd)
+    return output
+
+
+if __name__ == "__main__":
+    run()
@@ -11,8 +11,11 @@ Hardware Requirements:
 
 Package Requirements:
 - Python 3.7+
-- Standard library: subprocess, socket, json, os, time, shutil
-- System packages: net-tools, iproute2, iputils-ping, iptables
+- Standard library: asyncio, socket, json, os, time, shutil
+- Optional: orjson for faster result serialization
+- Optional: pyroute2 to read addresses/routes over netlink instead of forking ip
+- System packages: net-tools, iproute2, iptables
+- Optional: icmplib or fping (otherwise one iputils-ping per host)
 - Optional: docker.io, wireguard-tools
 - Optional: psutil for enhanced system monitoring
 
@@ -31,53 +34,233 @@ Network Configuration Context:
 - Docker bridge networks requiring proper iptables configuration
 """
 
+import asyncio
 import json
-import subprocess
 import socket
 import time
 import os
+import re
 import shutil
 from datetime import datetime
+from functools import lru_cache
 
-def run_command(cmd, timeout=10, capture_output=True):
-    """Run a command safely with timeout and error handling"""
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from pyroute2 import IPRoute
+except ImportError:
+    IPRoute = None
+
+try:
+    from tasks._reachability import ping_hosts
+except ImportError:  # run as a script from inside tasks/
+    from _reachability import ping_hosts
+
+NET_DIR = "/sys/class/net"
+DOCKER_CHAIN_RE = re.compile(rb"\bDOCKER(?:-USER|-ISOLATION-STAGE-\d+)?\b")
+NAMESERVER_RE = re.compile(rb"^[ \t]*nameserver[ \t]+(\S+)", re.M)
+MAX_OUTPUT_BYTES = 1024 * 1024  # per stream; guards against pathological command output
+# Interface-name prefix -> type, checked in order; first match wins
+IFACE_TYPE_RULES = (
+    ("wlan", "wifi_builtin"),
+    ("wlx", "wifi_external"),
+    ("eth", "ethernet"),
+    ("end", "ethernet"),
+    ("wg", "wireguard"),
+    ("br-", "docker_bridge"),
+    ("docker", "docker_bridge"),
+    ("veth", "docker_veth"),
+)
+IFACE_LIST_TTL = 30  # seconds; interface set is stable but veths come and go
+
+_iface_cache = {"expires": 0.0, "names": ()}
+_file_cache = {}  # path -> (st_mtime_ns, st_size, content)
+
+@lru_cache(maxsize=None)
+def _which(name):
+    """shutil.which, memoized - installed binaries do not move between runs"""
+    return shutil.which(name)
+
+def _read_sysfs(path):
+    """Read a tiny sysfs attribute; None if it is absent or the interface went away"""
     try:
-        if isinstance(cmd, str):
-            cmd = cmd.split()
-        result = subprocess.run(cmd, capture_output=capture_output, text=True, timeout=timeout)
-        return {
-            "command": " ".join(cmd),
-            "success": result.returncode == 0,
-            "stdout": result.stdout.strip() if capture_output else "",
-            "stderr": result.stderr.strip() if capture_output else "",
-            "returncode": result.returncode
-        }
-    except subprocess.TimeoutExpired:
+        with open(path, "rb") as f:
+            return f.read().decode("ascii", errors="replace").strip()
+    except OSError:
+        return None
+
+def _mtime_cached_read(path):
+    """Return a file's bytes, re-reading only when its mtime or size changed
+
+    Config files like resolv.conf and WireGuard confs rarely change between
+    diagnostic cycles, so the fast path is a single stat().
+    """
+    st = os.stat(path)
+    cached = _file_cache.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    with open(path, "rb") as f:
+        content = f.read()
+    _file_cache[path] = (st.st_mtime_ns, st.st_size, content)
+    return content
+
+def _json_default(obj):
+    """Decode raw command output only at serialization time"""
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode("utf-8", errors="replace")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _write_json(path, data):
+    """Serialize with orjson when available and write the bytes with one os.write loop"""
+    if orjson is not None:
+        payload = orjson.dumps(data, default=_json_default,
+                               option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(data, indent=2, default=_json_default).encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+def _list_ifaces():
+    """Names in /sys/class/net, cached for IFACE_LIST_TTL seconds"""
+    now = time.monotonic()
+    if now >= _iface_cache["expires"]:
+        try:
+            with os.scandir(NET_DIR) as entries:
+                names = tuple(entry.name for entry in entries)
+        except FileNotFoundError:
+            names = ()
+        _iface_cache.update(expires=now + IFACE_LIST_TTL, names=names)
+    return _iface_cache["names"]
+
+async def _read_bounded(stream, limit=MAX_OUTPUT_BYTES):
+    """Read a pipe to EOF keeping at most `limit` bytes; returns (data, truncated)"""
+    chunks = []
+    kept = 0
+    truncated = False
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        room = limit - kept
+        if room > 0:
+            chunks.append(chunk[:room])
+            kept += min(len(chunk), room)
+        if len(chunk) > room:
+            truncated = True  # keep draining so the child never blocks on a full pipe
+    return b"".join(chunks), truncated
+
+async def run_command_async(cmd, timeout=10, include_command=True):
+    """Run a command safely with timeout and error handling, supervised by the event loop
+
+    stdout/stderr are kept as raw bytes (capped at MAX_OUTPUT_BYTES each);
+    they are only decoded when the report is serialized. Callers that never
+    report the command line can pass include_command=False to skip building it.
+    """
+    if isinstance(cmd, str):
+        cmd_str = cmd if include_command else None
+        cmd = cmd.split()
+    else:
+        cmd_str = " ".join(cmd) if include_command else None
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+    except FileNotFoundError:
         return {
-            "command": " ".join(cmd),
+            "command": cmd_str,
             "success": False,
-            "stdout": "",
-            "stderr": f"Command timed out after {timeout} seconds",
+            "stdout": b"",
+            "stderr": f"Command not found: {cmd[0]}".encode(),
             "returncode": -1
         }
-    except FileNotFoundError:
+    except Exception as e:
         return {
-            "command": " ".join(cmd),
+            "command": cmd_str,
             "success": False,
-            "stdout": "",
-            "stderr": f"Command not found: {cmd[0]}",
+            "stdout": b"",
+            "stderr": str(e).encode(),
             "returncode": -1
         }
-    except Exception as e:
+    try:
+        (stdout, out_truncated), (stderr, err_truncated), _ = await asyncio.wait_for(
+            asyncio.gather(_read_bounded(proc.stdout), _read_bounded(proc.stderr), proc.wait()),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
         return {
-            "command": " ".join(cmd),
+            "command": cmd_str,
             "success": False,
-            "stdout": "",
-            "stderr": str(e),
+            "stdout": b"",
+            "stderr": f"Command timed out after {timeout} seconds".encode(),
             "returncode": -1
         }
+    result = {
+        "command": cmd_str,
+        "success": proc.returncode == 0,
+        "stdout": stdout.strip(),
+        "stderr": stderr.strip(),
+        "returncode": proc.returncode
+    }
+    if out_truncated or err_truncated:
+        result["truncated"] = True
+    return result
+
+def _not_installed(cmd):
+    """The result run_command_async would give for a binary that is not on PATH"""
+    return {
+        "command": " ".join(cmd),
+        "success": False,
+        "stdout": b"",
+        "stderr": f"Command not found: {cmd[0]}".encode(),
+        "returncode": -1
+    }
+
+async def run_commands_async(commands, timeout=10, include_command=True):
+    """Run independent commands concurrently; returns {key: run_command_async result}
+
+    Each command keeps its own timeout, so one hung binary does not hold up
+    the others and the total wait is bounded by the slowest command.
+    """
+    results = await asyncio.gather(
+        *(run_command_async(cmd, timeout, include_command) for cmd in commands.values())
+    )
+    return dict(zip(commands, results))
 
-def check_internet_connectivity():
+async def _probe_tcp(host, port, timeout=3):
+    """Single TCP reachability probe on a bare non-blocking socket
+
+    Targets are numeric addresses, so there is no resolver round trip and no
+    stream/transport setup - just a SYN whose completion the loop waits on.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        await asyncio.wait_for(asyncio.get_running_loop().sock_connect(sock, (host, port)), timeout)
+        return {"reachable": True, "error": None}
+    except Exception as e:
+        return {"reachable": False, "error": str(e) or type(e).__name__}
+    finally:
+        sock.close()
+
+async def _ping_hosts(hosts):
+    """Ping all hosts at once via the shared reachability helper, in this report's result shape"""
+    pings = await ping_hosts(hosts, count=1)
+    return {
+        host: {"success": result["success"], "output": result["stdout"]}
+        for host, result in pings.items()
+    }
+
+async def check_internet_connectivity():
     """Test internet connectivity using multiple methods"""
     targets = [
         ("1.1.1.1", 53),    # Cloudflare DNS
@@ -85,23 +268,12 @@ def check_internet_connectivity():
         ("9.9.9.9", 53),    # Quad9 DNS
     ]
     
-    results = {}
-    for host, port in targets:
-        try:
-            with socket.create_connection((host, port), timeout=3):
-                results[f"{host}:{port}"] = {"reachable": True, "error": None}
-        except Exception as e:
-            results[f"{host}:{port}"] = {"reachable": False, "error": str(e)}
-    
-    # Also try ping if available
-    ping_results = {}
-    if shutil.which("ping"):
-        for host, _ in targets:
-            ping_result = run_command(["ping", "-c", "1", "-W", "3", host])
-            ping_results[host] = {
-                "success": ping_result["success"],
-                "output": ping_result["stdout"]
-            }
+    # Socket probes and pings all go out at once
+    probes, ping_results = await asyncio.gather(
+        asyncio.gather(*(_probe_tcp(host, port) for host, port in targets)),
+        _ping_hosts([host for host, _ in targets])
+    )
+    results = {f"{host}:{port}": probe for (host, port), probe in zip(targets, probes)}
     
     return {
         "socket_connectivity": results,
@@ -109,66 +281,101 @@ def check_internet_connectivity():
         "overall_connectivity": any(r["reachable"] for r in results.values())
     }
 
-def analyze_network_interfaces():
+def _netlink_snapshot():
+    """Addresses and main-table IPv4 routes straight from netlink, in-process
+
+    Returns (addresses, routes) where addresses maps interface name to a list
+    of "addr/prefixlen" strings.
+    """
+    with IPRoute() as ipr:
+        names = {link["index"]: link.get_attr("IFLA_IFNAME") for link in ipr.get_links()}
+        addresses = {}
+        for msg in ipr.get_addr():
+            addr = msg.get_attr("IFA_ADDRESS")
+            if addr:
+                addresses.setdefault(names.get(msg["index"]), []).append(f"{addr}/{msg['prefixlen']}")
+        routes = []
+        for msg in ipr.get_routes(family=socket.AF_INET, table=254):
+            dst = msg.get_attr("RTA_DST")
+            routes.append({
+                "destination": f"{dst}/{msg['dst_len']}" if dst else "default",
+                "gateway": msg.get_attr("RTA_GATEWAY"),
+                "device": names.get(msg.get_attr("RTA_OIF")),
+                "source": msg.get_attr("RTA_PREFSRC")
+            })
+    return addresses, routes
+
+async def analyze_network_interfaces():
     """Analyze all network interfaces and their status"""
     interfaces = {}
     
-    # Get interface list
-    ip_addr = run_command(["ip", "addr", "show"])
-    ip_route = run_command(["ip", "route", "show"])
+    # Addresses and routes: netlink when pyroute2 is installed, else fork ip
+    netlink = None
+    if IPRoute is not None:
+        try:
+            netlink = _netlink_snapshot()
+        except Exception:
+            netlink = None  # no netlink access in this namespace; use the ip binary
+    if netlink is None:
+        ip_results = await run_commands_async({
+            "addr": ["ip", "addr", "show"],
+            "route": ["ip", "route", "show"]
+        })
+        ip_addr = ip_results["addr"]
+        ip_route = ip_results["route"]
     
     # Parse interfaces from /sys/class/net
-    net_dir = "/sys/class/net"
-    if os.path.exists(net_dir):
-        for iface in os.listdir(net_dir):
-            if iface == "lo":  # Skip loopback
-                continue
-                
-            iface_info = {
-                "name": iface,
-                "type": "unknown",
-                "status": "unknown",
-                "ip_addresses": [],
-                "mac_address": None
-            }
-            
-            # Determine interface type
-            if iface.startswith("wlan"):
-                iface_info["type"] = "wifi_builtin"
-            elif iface.startswith("wlx"):
-                iface_info["type"] = "wifi_external"
-            elif iface.startswith("eth") or iface.startswith("end"):
-                iface_info["type"] = "ethernet"
-            elif iface.startswith("wg"):
-                iface_info["type"] = "wireguard"
-            elif iface.startswith("br-") or iface.startswith("docker"):
-                iface_info["type"] = "docker_bridge"
-            elif iface.startswith("veth"):
-                iface_info["type"] = "docker_veth"
+    for iface in _list_ifaces():
+        if iface == "lo":  # Skip loopback
+            continue
             
-            # Get status
-            operstate_file = f"{net_dir}/{iface}/operstate"
-            if os.path.exists(operstate_file):
-                with open(operstate_file) as f:
-                    iface_info["status"] = f.read().strip()
-            
-            # Get MAC address
-            address_file = f"{net_dir}/{iface}/address"
-            if os.path.exists(address_file):
-                with open(address_file) as f:
-                    iface_info["mac_address"] = f.read().strip()
-            
-            interfaces[iface] = iface_info
+        iface_info = {
+            "name": iface,
+            "type": "unknown",
+            "status": "unknown",
+            "ip_addresses": [],
+            "mac_address": None
+        }
+        
+        # Determine interface type
+        for prefix, iface_type in IFACE_TYPE_RULES:
+            if iface.startswith(prefix):
+                iface_info["type"] = iface_type
+                break
+        
+        # Get status
+        status = _read_sysfs(f"{NET_DIR}/{iface}/operstate")
+        if status is not None:
+            iface_info["status"] = status
+        
+        # Get MAC address
+        iface_info["mac_address"] = _read_sysfs(f"{NET_DIR}/{iface}/address")
+        
+        if netlink is not None:
+            iface_info["ip_addresses"] = netlink[0].get(iface, [])
+        
+        interfaces[iface] = iface_info
     
+    if netlink is not None:
+        return {
+            "interfaces": interfaces,
+            "source": "netlink",
+            "routes": netlink[1]
+        }
     return {
         "interfaces": interfaces,
+        "source": "ip",
         "ip_addr_output": ip_addr["stdout"] if ip_addr["success"] else ip_addr["stderr"],
         "ip_route_output": ip_route["stdout"] if ip_route["success"] else ip_route["stderr"]
     }
 
-def analyze_wireguard():
+async def analyze_wireguard():
     """Analyze WireGuard configuration and status"""
-    wg_show = run_command(["wg", "show"])
+    wireguard_available = _which("wg") is not None
+    if wireguard_available:
+        wg_show = await run_command_async(["wg", "show"])
+    else:
+        wg_show = _not_installed(["wg", "show"])
     wg_configs = []
     
     # Look for config files
@@ -179,15 +386,14 @@ def analyze_wireguard():
                 if file.endswith(".conf"):
                     config_path = os.path.join(config_dir, file)
                     try:
-                        with open(config_path) as f:
-                            # Don't read sensitive keys, just check structure
-                            content = f.read()
-                            wg_configs.append({
-                                "file": config_path,
-                                "has_interface": "[Interface]" in content,
-                                "has_peer": "[Peer]" in content,
-                                "lines": len(content.splitlines())
-                            })
+                        # Don't read sensitive keys, just check structure
+                        content = _mtime_cached_read(config_path).decode(errors="replace")
+                        wg_configs.append({
+                            "file": config_path,
+                            "has_interface": "[Interface]" in content,
+                            "has_peer": "[Peer]" in content,
+                            "lines": len(content.splitlines())
+                        })
                     except Exception as e:
                         wg_configs.append({
                             "file": config_path,
@@ -197,18 +403,40 @@ def analyze_wireguard():
     return {
         "wg_show": wg_show,
         "config_files": wg_configs,
-        "wireguard_available": shutil.which("wg") is not None
+        "wireguard_available": wireguard_available
     }
 
-def analyze_docker_networking():
+async def analyze_docker_networking():
     """Analyze Docker networking configuration and issues"""
-    docker_info = run_command(["docker", "info"])
-    docker_ps = run_command(["docker", "ps", "-a"])
-    docker_networks = run_command(["docker", "network", "ls"])
+    commands = {
+        "docker_info": ["docker", "info"],
+        "docker_ps": ["docker", "ps", "-a"],
+        "docker_networks": ["docker", "network", "ls"],
+        # Check iptables for Docker rules
+        "iptables_nat": ["iptables", "-t", "nat", "-L", "-n"],
+        "iptables_filter": ["iptables", "-L", "-n"]
+    }
+    
+    # Without a docker binary none of these can tell us anything useful
+    if _which("docker") is None:
+        return {
+            **{key: _not_installed(cmd) for key, cmd in commands.items()},
+            "iptables_docker_chains": [],
+            "issues": [{
+                "type": "docker_daemon",
+                "severity": "high",
+                "description": "Docker is not installed",
+                "suggestion": "Install Docker if container diagnostics are needed"
+            }],
+            "docker_available": False
+        }
     
-    # Check iptables for Docker rules
-    iptables_nat = run_command(["iptables", "-t", "nat", "-L", "-n"])
-    iptables_filter = run_command(["iptables", "-L", "-n"])
+    results = await run_commands_async(commands)
+    docker_info = results["docker_info"]
+    docker_ps = results["docker_ps"]
+    docker_networks = results["docker_networks"]
+    iptables_nat = results["iptables_nat"]
+    iptables_filter = results["iptables_filter"]
     
     # Check for common Docker networking issues
     issues = []
@@ -222,8 +450,9 @@ def analyze_docker_networking():
             "suggestion": "Check if Docker is installed and running: sudo systemctl status docker"
         })
     
-    # Check for iptables issues
-    if "DOCKER" not in iptables_filter.get("stdout", ""):
+    # Check for iptables issues - one scan of the listing collects every Docker chain name
+    docker_chains = {name.decode() for name in DOCKER_CHAIN_RE.findall(iptables_filter.get("stdout", b""))}
+    if "DOCKER" not in docker_chains:
         issues.append({
             "type": "iptables_docker_chain",
             "severity": "medium", 
@@ -237,47 +466,61 @@ def analyze_docker_networking():
         "docker_networks": docker_networks,
         "iptables_nat": iptables_nat,
         "iptables_filter": iptables_filter,
+        "iptables_docker_chains": sorted(docker_chains),
         "issues": issues,
-        "docker_available": shutil.which("docker") is not None
+        "docker_available": True
     }
 
-def analyze_dns_configuration():
-    """Analyze DNS configuration and resolution"""
+async def analyze_dns_configuration(connectivity_ok=True):
+    """Analyze DNS configuration and resolution
+
+    With no internet connectivity every lookup would just burn its resolver
+    timeout, so the resolution and nslookup tests are skipped.
+    """
     # Check resolv.conf
     resolv_conf = {"exists": False, "content": "", "nameservers": []}
-    if os.path.exists("/etc/resolv.conf"):
+    try:
+        content = _mtime_cached_read("/etc/resolv.conf")
         resolv_conf["exists"] = True
-        try:
-            with open("/etc/resolv.conf") as f:
-                content = f.read()
-                resolv_conf["content"] = content
-                for line in content.splitlines():
-                    line = line.strip()
-                    if line.startswith("nameserver"):
-                        parts = line.split()
-                        if len(parts) >= 2:
-                            resolv_conf["nameservers"].append(parts[1])
-        except Exception as e:
-            resolv_conf["error"] = str(e)
+        resolv_conf["content"] = content.decode(errors="replace")
+        resolv_conf["nameservers"] = [ns.decode(errors="replace") for ns in NAMESERVER_RE.findall(content)]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        resolv_conf["exists"] = True
+        resolv_conf["error"] = str(e)
     
     # Test DNS resolution
     dns_tests = {}
     test_domains = ["google.com", "github.com", "cloudflare.com"]
     
-    for domain in test_domains:
-        try:
-            import socket
-            result = socket.gethostbyname(domain)
-            dns_tests[domain] = {"success": True, "ip": result}
-        except Exception as e:
-            dns_tests[domain] = {"success": False, "error": str(e)}
+    if not connectivity_ok:
+        return {
+            "resolv_conf": resolv_conf,
+            "dns_resolution_tests": {
+                domain: {"success": False, "error": "skipped_no_connectivity"} for domain in test_domains
+            },
+            "nslookup_tests": {}
+        }
     
+    loop = asyncio.get_running_loop()
+    nslookup_cmds = {}
     # Test with nslookup if available
-    nslookup_tests = {}
-    if shutil.which("nslookup"):
-        for domain in test_domains:
-            nslookup_result = run_command(["nslookup", domain])
-            nslookup_tests[domain] = nslookup_result
+    if _which("nslookup"):
+        nslookup_cmds = {domain: ["nslookup", domain] for domain in test_domains}
+    
+    resolutions, nslookup_tests = await asyncio.gather(
+        asyncio.gather(
+            *(asyncio.wait_for(loop.getaddrinfo(domain, None), 5) for domain in test_domains),
+            return_exceptions=True
+        ),
+        run_commands_async(nslookup_cmds)
+    )
+    for domain, result in zip(test_domains, resolutions):
+        if isinstance(result, Exception):
+            dns_tests[domain] = {"success": False, "error": str(result) or type(result).__name__}
+        else:
+            dns_tests[domain] = {"success": True, "ip": result[0][4][0]}
     
     return {
         "resolv_conf": resolv_conf,
@@ -285,9 +528,8 @@ def analyze_dns_configuration():
         "nslookup_tests": nslookup_tests
     }
 
-def generate_iptables_fix_script():
-    """Generate a script to fix common Docker iptables issues"""
-    script_content = """#!/bin/bash
+# Static repair script written out by main() when Docker chains are missing
+IPTABLES_FIX_SCRIPT = """#!/bin/bash
 # Docker IPTables Fix Script
 # This script repairs common Docker networking issues
 
@@ -348,8 +590,28 @@ echo "You can now try running your containers again."
 echo "Cleaning up fix script..."
 rm -f "$0"
 """
+
+def generate_iptables_fix_script():
+    """Generate a script to fix common Docker iptables issues"""
+    return IPTABLES_FIX_SCRIPT
+
+async def gather_diagnostics():
+    """Run every diagnostic phase concurrently and return them keyed by section"""
+    connectivity = asyncio.ensure_future(check_internet_connectivity())
+    
+    async def dns_after_connectivity():
+        # DNS tests are only meaningful once we know the internet is reachable
+        return await analyze_dns_configuration((await connectivity)["overall_connectivity"])
     
-    return script_content
+    phases = {
+        "internet_connectivity": connectivity,
+        "network_interfaces": analyze_network_interfaces(),
+        "wireguard_analysis": analyze_wireguard(),
+        "docker_networking": analyze_docker_networking(),
+        "dns_configuration": dns_after_connectivity()
+    }
+    results = await asyncio.gather(*phases.values())
+    return dict(zip(phases, results))
 
 def main():
     """Main diagnostic function"""
@@ -357,16 +619,13 @@ def main():
     
     timestamp = datetime.now().isoformat()
     
-    # Gather all diagnostic information
+    # Gather all diagnostic information; the phases are independent and
+    # dominated by subprocess/socket waits, so one event loop drives them all
     diagnostic_data = {
         "timestamp": timestamp,
-        "hostname": socket.gethostname(),
-        "internet_connectivity": check_internet_connectivity(),
-        "network_interfaces": analyze_network_interfaces(),
-        "wireguard_analysis": analyze_wireguard(),
-        "docker_networking": analyze_docker_networking(),
-        "dns_configuration": analyze_dns_configuration()
+        "hostname": socket.gethostname()
     }
+    diagnostic_data.update(asyncio.run(gather_diagnostics()))
     
     # Generate recommendations
     recommendations = []
@@ -409,8 +668,7 @@ def main():
     os.makedirs('/app/agent_memory', exist_ok=True)
     
     # Save comprehensive diagnostic results
-    with open('/app/agent_memory/comprehensive_network_diagnostic.json', 'w') as f:
-        json.dump(diagnostic_data, f, indent=2)
+    _write_json('/app/agent_memory/comprehensive_network_diagnostic.json', diagnostic_data)
     
     # Generate and save IPTables fix script if needed
     if any(r.get("script_available") for r in recommendations):
@@ -425,10 +683,17 @@ def main():
     
     # Print summary
     print("\n=== DIAGNOSTIC SUMMARY ===")
-    print(f"Internet Connectivity: {'✅ OK' if diagnostic_data['internet_connectivity']['overall_connectivity'] else '❌ FAILED'}")
-    print(f"Docker Available: {'✅ YES' if diagnostic_data['docker_networking']['docker_available'] else '❌ NO'}")
-    print(f"WireGuard Available: {'✅ YES' if diagnostic_data['wireguard_analysis']['wireguard_available'] else '❌ NO'}")
-    print(f"DNS Resolution: {'✅ OK' if any(t['success'] for t in diagnostic_data['dns_configuration']['dns_resolution_tests'].values()) else '❌ FAILED'}")
+    summary = {
+        "Internet Connectivity": (diagnostic_data["internet_connectivity"]["overall_connectivity"], "✅ OK", "❌ FAILED"),
+        "Docker Available": (diagnostic_data["docker_networking"]["docker_available"], "✅ YES", "❌ NO"),
+        "WireGuard Available": (diagnostic_data["wireguard_analysis"]["wireguard_available"], "✅ YES", "❌ NO"),
+        "DNS Resolution": (
+            any(t["success"] for t in diagnostic_data["dns_configuration"]["dns_resolution_tests"].values()),
+            "✅ OK", "❌ FAILED"
+        )
+    }
+    for label, (ok, good, bad) in summary.items():
+        print(f"{label}: {good if ok else bad}")
     
     if recommendations:
         print(f"\n⚠️  {len(recommendations)} recommendations generated")
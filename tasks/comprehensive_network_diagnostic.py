@@ -12,8 +12,11 @@ Hardware Requirements:
 - USB 3.0 ports recommended for external adapter performance
 
 Package Requirements:
-- Python 3.7+
+- Python 3.7+ (asyncio.run)
 - System utilities: ip, ping, nslookup, iptables, systemctl
+- Optional: aiodns (DNS tests without spawning nslookup)
+- Optional: orjson (faster report serialization)
+- Optional: icmplib or fping (ping all targets at once instead of one ping each)
 - WireGuard tools: wg, wg-quick (wireguard-tools package)
 - Docker tools: docker, docker-compose (if containerized services)
 - Network utilities: ufw, netstat (optional but recommended)
@@ -25,120 +28,238 @@ System Dependencies:
 - /proc and /sys filesystems mounted
 - sudo access for privileged network commands
 """
+import asyncio
 import json
 import os
 import time
-import subprocess
 import socket
 import re
+import shlex
 from pathlib import Path
 
+try:
+    import aiodns
+except ImportError:
+    aiodns = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from tasks._reachability import ping_hosts
+except ImportError:  # run as a script from inside tasks/
+    from _reachability import ping_hosts
+
+# 'ip addr show' text parsing (fallback when ip has no -j)
+IF_LINE_RE = re.compile(r'^(\d+):\s+([^:]+):\s+<([^>]+)>')
+ADDR_LINE_RE = re.compile(r'inet6?\s+(\S+)')
+
+# Interface role lookup: exact names first, then name prefixes in order
+DOCKER_BRIDGE_ROLE = ('docker_bridge', 'Docker container bridge network')
+EXACT_INTERFACE_ROLES = {
+    'wlan0': ('builtin_wifi', 'Built-in Pi WiFi - Reserved for WireGuard tunnel'),
+    'lo': ('loopback', 'System loopback interface'),
+}
+PREFIX_INTERFACE_ROLES = (
+    ('wlx', 'external_wifi_adapter', 'External USB WiFi adapter (Netgear A7000) - Home network connection'),
+    ('wg', 'wireguard_tunnel', 'WireGuard VPN tunnel interface'),
+    ('eth', 'ethernet', 'Ethernet interface (typically unused on this Pi)'),
+    ('end', 'ethernet', 'Ethernet interface (typically unused on this Pi)'),
+    ('br-', *DOCKER_BRIDGE_ROLE),
+)
+
+# One subprocess per distinct command per diagnostic run: 'wg show' and
+# 'docker ps' are asked for by several sub-diagnostics. Tasks are cached (not
+# results) so concurrent callers share a command that is still running.
+_command_cache = {}
+
 def run_command(cmd, timeout=10, ignore_errors=False):
-    """Run shell command with timeout and comprehensive error handling"""
+    """Run a command with timeout and comprehensive error handling
+
+    cmd may be a string (split with shlex, no shell involved) or an argv list.
+    Returns an awaitable; repeated calls with the same arguments within one
+    event loop share a single subprocess. Treat the result dict as read-only.
+    """
+    loop = asyncio.get_running_loop()
+    if _command_cache.get('loop') is not loop:
+        _command_cache.clear()
+        _command_cache['loop'] = loop
+    key = (cmd if isinstance(cmd, str) else tuple(cmd), timeout, ignore_errors)
+    task = _command_cache.get(key)
+    if task is None:
+        task = _command_cache[key] = loop.create_task(_run_command(cmd, timeout, ignore_errors))
+    return task
+
+async def _run_command(cmd, timeout, ignore_errors):
+    """Spawn one command under the event loop and collect its output"""
+    argv = shlex.split(cmd) if isinstance(cmd, str) else list(cmd)
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=timeout)
+        proc = await asyncio.create_subprocess_exec(
+            *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return {'success': False, 'error': 'Command timeout', 'stdout': '', 'stderr': '', 'command': cmd}
         return {
-            'success': result.returncode == 0 or ignore_errors,
-            'stdout': result.stdout.strip(),
-            'stderr': result.stderr.strip(),
-            'returncode': result.returncode,
+            'success': proc.returncode == 0 or ignore_errors,
+            'stdout': stdout.decode(errors='replace').strip(),
+            'stderr': stderr.decode(errors='replace').strip(),
+            'returncode': proc.returncode,
             'command': cmd
         }
-    except subprocess.TimeoutExpired:
-        return {'success': False, 'error': 'Command timeout', 'stdout': '', 'stderr': '', 'command': cmd}
     except Exception as e:
         return {'success': False, 'error': str(e), 'stdout': '', 'stderr': '', 'command': cmd}
 
-def detect_system_architecture():
+def report_timestamp():
+    """UTC timestamp in the report's format"""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+async def dns_probe(domain, server='', timeout=5):
+    """Resolve domain via server ('' = system resolver); same result shape as run_command
+
+    With aiodns the A query goes out as a UDP packet from this process;
+    without it we fall back to one nslookup process per server.
+    """
+    if aiodns is None:
+        return await run_command(f"nslookup {domain} {server}" if server else f"nslookup {domain}", timeout=timeout)
+    
+    resolver = aiodns.DNSResolver(nameservers=[server] if server else None, timeout=timeout, tries=1)
+    try:
+        answers = await asyncio.wait_for(resolver.query(domain, 'A'), timeout)
+        addresses = [answer.host for answer in answers]
+        return {'success': True, 'stdout': '\n'.join(addresses), 'stderr': '', 'addresses': addresses}
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'stdout': '', 'stderr': str(e)}
+
+async def probe_service(host, port, timeout=5):
+    """TCP connect probe; returns None on success or the error text"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.close()
+        return None
+    except asyncio.TimeoutError:
+        return 'timed out'
+    except Exception as e:
+        return str(e)
+
+def _interface_role(if_name):
+    """Map an interface name to (role, purpose) per the Pi networking strategy"""
+    exact = EXACT_INTERFACE_ROLES.get(if_name)
+    if exact:
+        return exact
+    for prefix, role, purpose in PREFIX_INTERFACE_ROLES:
+        if if_name.startswith(prefix):
+            return role, purpose
+    if 'docker' in if_name:
+        return DOCKER_BRIDGE_ROLE
+    return 'unknown', 'Unknown interface'
+
+def _interface_entry(if_name, flags):
+    role, purpose = _interface_role(if_name)
+    return {
+        'role': role,
+        'purpose': purpose,
+        'state': 'UP' if 'UP' in flags else 'DOWN',
+        'flags': flags,
+        'addresses': []
+    }
+
+def _parse_ip_addr_json(stdout):
+    """Interfaces from 'ip -j addr show'; None if the output is not JSON"""
+    try:
+        data = json.loads(stdout)
+    except ValueError:
+        return None
+    interfaces = {}
+    for iface in data:
+        entry = interfaces[iface['ifname']] = _interface_entry(iface['ifname'], iface.get('flags', []))
+        for addr in iface.get('addr_info', []):
+            if 'local' in addr:
+                entry['addresses'].append(f"{addr['local']}/{addr['prefixlen']}")
+    return interfaces
+
+def _parse_ip_addr_text(stdout):
+    """Interfaces from plain 'ip addr show' output"""
+    interfaces = {}
+    current_interface = None
+    for line in stdout.splitlines():
+        if_match = IF_LINE_RE.match(line)
+        if if_match:
+            if_name = if_match.group(2).strip()
+            interfaces[if_name] = _interface_entry(if_name, if_match.group(3).split(','))
+            current_interface = if_name
+        elif current_interface and 'inet' in line:
+            addr_match = ADDR_LINE_RE.search(line)
+            if addr_match:
+                interfaces[current_interface]['addresses'].append(addr_match.group(1))
+    return interfaces
+
+async def detect_system_architecture(timestamp=None):
     """Detect the system architecture and networking setup"""
     architecture = {
         'hostname': socket.gethostname(),
-        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'timestamp': timestamp or report_timestamp(),
         'interfaces': {},
         'routing': {},
         'services': {},
         'configuration': {}
     }
     
-    # Detect network interfaces and their roles
-    interfaces_result = run_command("ip addr show")
-    if interfaces_result['success']:
-        current_interface = None
-        for line in interfaces_result['stdout'].split('\n'):
-            if_match = re.match(r'^(\d+):\s+([^:]+):\s+<([^>]+)>', line)
-            if if_match:
-                if_name = if_match.group(2).strip()
-                flags = if_match.group(3).split(',')
-                
-                # Determine interface role based on Pi networking strategy
-                role = 'unknown'
-                purpose = 'Unknown interface'
-                
-                if if_name == 'wlan0':
-                    role = 'builtin_wifi'
-                    purpose = 'Built-in Pi WiFi - Reserved for WireGuard tunnel'
-                elif if_name.startswith('wlx'):
-                    role = 'external_wifi_adapter'
-                    purpose = 'External USB WiFi adapter (Netgear A7000) - Home network connection'
-                elif if_name.startswith('wg'):
-                    role = 'wireguard_tunnel'
-                    purpose = 'WireGuard VPN tunnel interface'
-                elif if_name.startswith('eth') or if_name.startswith('end'):
-                    role = 'ethernet'
-                    purpose = 'Ethernet interface (typically unused on this Pi)'
-                elif if_name.startswith('br-') or 'docker' in if_name:
-                    role = 'docker_bridge'
-                    purpose = 'Docker container bridge network'
-                elif if_name == 'lo':
-                    role = 'loopback'
-                    purpose = 'System loopback interface'
-                
-                architecture['interfaces'][if_name] = {
-                    'role': role,
-                    'purpose': purpose,
-                    'state': 'UP' if 'UP' in flags else 'DOWN',
-                    'flags': flags,
-                    'addresses': []
-                }
-                current_interface = if_name
-            elif current_interface and 'inet' in line:
-                addr_match = re.search(r'inet6?\s+([^\s]+)', line)
-                if addr_match:
-                    architecture['interfaces'][current_interface]['addresses'].append(addr_match.group(1))
+    interfaces_result, routes_result, wg_result, docker_result = await asyncio.gather(
+        run_command("ip -j addr show"),
+        run_command("ip route show"),
+        run_command("wg show"),
+        run_command("docker ps")
+    )
+    
+    # Detect network interfaces and their roles; iproute2's JSON output
+    # parses in one json.loads, older/BusyBox ip falls back to the text form
+    interfaces = _parse_ip_addr_json(interfaces_result['stdout']) if interfaces_result['success'] else None
+    if interfaces is None:
+        text_result = await run_command("ip addr show")
+        if text_result['success']:
+            interfaces = _parse_ip_addr_text(text_result['stdout'])
+    if interfaces:
+        architecture['interfaces'] = interfaces
     
     # Analyze routing configuration
-    routes_result = run_command("ip route show")
     if routes_result['success']:
-        architecture['routing']['ipv4'] = routes_result['stdout'].split('\n')
+        routing = architecture['routing']
+        routing['ipv4'] = routes = []
         
-        # Identify key routes
-        for route in architecture['routing']['ipv4']:
+        # Collect routes and identify the key defaults in the same pass
+        for route in routes_result['stdout'].splitlines():
+            routes.append(route)
             if route.startswith('default'):
                 if 'wlan0' in route:
-                    architecture['routing']['default_via_builtin'] = route
+                    routing['default_via_builtin'] = route
                 elif 'wlx' in route:
-                    architecture['routing']['default_via_external'] = route
+                    routing['default_via_external'] = route
     
     # Check WireGuard status
-    wg_result = run_command("wg show")
     architecture['services']['wireguard'] = {
         'active': wg_result['success'] and bool(wg_result['stdout']),
         'output': wg_result['stdout'] if wg_result['success'] else None
     }
     
     # Check Docker status
-    docker_result = run_command("docker ps")
     architecture['services']['docker'] = {
         'active': docker_result['success'],
-        'containers': len(docker_result['stdout'].split('\n')) - 1 if docker_result['success'] else 0
+        # stdout is stripped, so the newline count is the number of rows below the header
+        'containers': docker_result['stdout'].count('\n') if docker_result['success'] else 0
     }
     
     return architecture
 
-def diagnose_connectivity_issues():
+async def diagnose_connectivity_issues(timestamp=None):
     """Comprehensive connectivity diagnostic"""
     connectivity = {
-        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'timestamp': timestamp or report_timestamp(),
         'dns_tests': {},
         'ping_tests': {},
         'service_tests': {},
@@ -154,10 +275,22 @@ def diagnose_connectivity_issues():
         ('local_router', '192.168.0.1')
     ]
     
-    for name, server in dns_servers:
-        cmd = f"nslookup github.com {server}" if server else "nslookup github.com"
-        result = run_command(cmd, timeout=5)
-        
+    # Test ping connectivity
+    ping_targets = [
+        ('local_gateway', '192.168.0.1'),
+        ('google_dns', '8.8.8.8'),
+        ('cloudflare_dns', '1.1.1.1'),
+        ('github_ip', '140.82.114.3')
+    ]
+    
+    # All lookups and pings are independent, so they run at the same time
+    *dns_results, ping_by_target = await asyncio.gather(
+        *(dns_probe('github.com', server) for _, server in dns_servers),
+        ping_hosts([target for _, target in ping_targets])
+    )
+    ping_results = [ping_by_target[target] for _, target in ping_targets]
+    
+    for (name, server), result in zip(dns_servers, dns_results):
         connectivity['dns_tests'][name] = {
             'server': server or 'system default',
             'success': result['success'],
@@ -169,16 +302,7 @@ def diagnose_connectivity_issues():
             connectivity['issues'].append(f"DNS hijacking detected on {name} - github.com resolving to VPN peer IP")
             connectivity['recommendations'].append("Check /etc/hosts file and DNS configuration")
     
-    # Test ping connectivity
-    ping_targets = [
-        ('local_gateway', '192.168.0.1'),
-        ('google_dns', '8.8.8.8'),
-        ('cloudflare_dns', '1.1.1.1'),
-        ('github_ip', '140.82.114.3')
-    ]
-    
-    for name, target in ping_targets:
-        result = run_command(f"ping -c 2 -W 3 {target}", timeout=10)
+    for (name, target), result in zip(ping_targets, ping_results):
         connectivity['ping_tests'][name] = {
             'target': target,
             'success': result['success'],
@@ -192,20 +316,18 @@ def diagnose_connectivity_issues():
         ('dns_service', '8.8.8.8', 53)
     ]
     
-    for name, host, port in services:
-        try:
-            sock = socket.create_connection((host, port), timeout=5)
-            sock.close()
-            connectivity['service_tests'][name] = {'success': True, 'host': host, 'port': port}
-        except Exception as e:
-            connectivity['service_tests'][name] = {'success': False, 'host': host, 'port': port, 'error': str(e)}
+    probes = await asyncio.gather(*(probe_service(host, port) for _, host, port in services))
+    for (name, host, port), error in zip(services, probes):
+        connectivity['service_tests'][name] = {'success': error is None, 'host': host, 'port': port}
+        if error is not None:
+            connectivity['service_tests'][name]['error'] = error
     
     return connectivity
 
-def analyze_wireguard_configuration():
+async def analyze_wireguard_configuration(timestamp=None):
     """Analyze WireGuard setup and configuration"""
     wg_analysis = {
-        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'timestamp': timestamp or report_timestamp(),
         'config_exists': False,
         'config_readable': False,
         'runtime_status': {},
@@ -215,33 +337,43 @@ def analyze_wireguard_configuration():
     
     config_path = '/etc/wireguard/wg0.conf'
     
-    # Check if config file exists
-    if os.path.exists(config_path):
+    # Open directly: a missing file shows up as FileNotFoundError
+    try:
+        with open(config_path, 'r') as f:
+            content = f.read()
+    except FileNotFoundError:
+        wg_analysis['recommendations'].append("WireGuard configuration not found - create /etc/wireguard/wg0.conf")
+    except PermissionError:
         wg_analysis['config_exists'] = True
-        
-        try:
-            with open(config_path, 'r') as f:
-                content = f.read()
-                wg_analysis['config_readable'] = True
-                
-                # Basic config analysis
-                if '[Interface]' in content:
-                    wg_analysis['analysis']['has_interface_section'] = True
-                if '[Peer]' in content:
-                    wg_analysis['analysis']['has_peer_section'] = True
-                if 'AllowedIPs = 0.0.0.0/0' in content:
-                    wg_analysis['analysis']['tunnel_type'] = 'full_tunnel'
-                    wg_analysis['recommendations'].append("Consider split tunneling for better local network access")
-                elif 'AllowedIPs' in content:
-                    wg_analysis['analysis']['tunnel_type'] = 'split_tunnel'
-                
-        except PermissionError:
-            wg_analysis['recommendations'].append("Cannot read WireGuard config - check permissions")
+        wg_analysis['recommendations'].append("Cannot read WireGuard config - check permissions")
     else:
-        wg_analysis['recommendations'].append("WireGuard configuration not found - create /etc/wireguard/wg0.conf")
+        wg_analysis['config_exists'] = True
+        wg_analysis['config_readable'] = True
+        
+        # Basic config analysis - one pass sets every flag
+        has_interface = has_peer = full_tunnel = allowed_ips = False
+        for line in content.splitlines():
+            if '[Interface]' in line:
+                has_interface = True
+            if '[Peer]' in line:
+                has_peer = True
+            if 'AllowedIPs' in line:
+                allowed_ips = True
+                if 'AllowedIPs = 0.0.0.0/0' in line:
+                    full_tunnel = True
+        
+        if has_interface:
+            wg_analysis['analysis']['has_interface_section'] = True
+        if has_peer:
+            wg_analysis['analysis']['has_peer_section'] = True
+        if full_tunnel:
+            wg_analysis['analysis']['tunnel_type'] = 'full_tunnel'
+            wg_analysis['recommendations'].append("Consider split tunneling for better local network access")
+        elif allowed_ips:
+            wg_analysis['analysis']['tunnel_type'] = 'split_tunnel'
     
     # Check runtime status
-    wg_result = run_command("wg show")
+    wg_result = await run_command("wg show")
     wg_analysis['runtime_status'] = {
         'active': wg_result['success'] and bool(wg_result['stdout']),
         'output': wg_result['stdout'] if wg_result['success'] else None
@@ -249,10 +381,10 @@ def analyze_wireguard_configuration():
     
     return wg_analysis
 
-def check_docker_networking():
+async def check_docker_networking(timestamp=None):
     """Check Docker networking setup and potential conflicts"""
     docker_net = {
-        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'timestamp': timestamp or report_timestamp(),
         'docker_active': False,
         'networks': [],
         'iptables_status': {},
@@ -260,14 +392,14 @@ def check_docker_networking():
     }
     
     # Check if Docker is running
-    docker_ps = run_command("docker ps")
+    docker_ps = await run_command("docker ps")
     docker_net['docker_active'] = docker_ps['success']
     
     if docker_net['docker_active']:
         # List Docker networks
-        networks_result = run_command("docker network ls")
+        networks_result = await run_command("docker network ls")
         if networks_result['success']:
-            for line in networks_result['stdout'].split('\n')[1:]:  # Skip header
+            for line in networks_result['stdout'].splitlines()[1:]:  # Skip header
                 if line.strip():
                     parts = line.split()
                     if len(parts) >= 3:
@@ -277,18 +409,18 @@ def check_docker_networking():
                             'driver': parts[2]
                         })
     
-    # Check iptables Docker chains
+    # Check iptables Docker chains - one filter-table dump answers for all of them
     iptables_chains = ['DOCKER', 'DOCKER-USER', 'DOCKER-ISOLATION-STAGE-1']
+    dump = await run_command("iptables-save -t filter")
     for chain in iptables_chains:
-        result = run_command(f"iptables -L {chain} -n", ignore_errors=True)
-        docker_net['iptables_status'][chain] = result['success']
+        docker_net['iptables_status'][chain] = dump['success'] and f":{chain} " in dump['stdout']
     
     return docker_net
 
-def generate_system_insights():
+async def generate_system_insights(timestamp=None):
     """Generate insights about the current network configuration"""
     insights = {
-        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'timestamp': timestamp or report_timestamp(),
         'system_health': 'unknown',
         'configuration_status': 'unknown',
         'key_findings': [],
@@ -296,11 +428,15 @@ def generate_system_insights():
         'user_questions': []
     }
     
-    # Load all diagnostic data
-    architecture = detect_system_architecture()
-    connectivity = diagnose_connectivity_issues()
-    wireguard = analyze_wireguard_configuration()
-    docker = check_docker_networking()
+    # Load all diagnostic data - the four probes are independent and share
+    # one timestamp so the sub-reports line up
+    timestamp = insights['timestamp']
+    architecture, connectivity, wireguard, docker = await asyncio.gather(
+        detect_system_architecture(timestamp),
+        diagnose_connectivity_issues(timestamp),
+        analyze_wireguard_configuration(timestamp),
+        check_docker_networking(timestamp)
+    )
     
     # Analyze system health
     active_interfaces = len([i for i in architecture['interfaces'].values() if i['state'] == 'UP'])
@@ -355,12 +491,14 @@ def main():
     print("Starting comprehensive network diagnostic...")
     
     # Run all diagnostics
-    insights, architecture, connectivity, wireguard, docker = generate_system_insights()
+    _command_cache.clear()
+    timestamp = report_timestamp()
+    insights, architecture, connectivity, wireguard, docker = asyncio.run(generate_system_insights(timestamp))
     
     # Compile complete diagnostic report
     report = {
         'metadata': {
-            'generated_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            'generated_at': timestamp,
             'hostname': socket.gethostname(),
             'diagnostic_version': '1.0'
         },
@@ -373,8 +511,11 @@ def main():
     
     # Save comprehensive report
     os.makedirs('/app/agent_memory', exist_ok=True)
-    with open('/app/agent_memory/comprehensive_network_diagnostic.json', 'w') as f:
-        json.dump(report, f, indent=2)
+    with open('/app/agent_memory/comprehensive_network_diagnostic.json', 'wb') as f:
+        if orjson is not None:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        else:
+            f.write(json.dumps(report, indent=2).encode('utf-8'))
     
     # Print executive summary
     print(f"\n=== COMPREHENSIVE NETWORK DIAGNOSTIC COMPLETE ===")
@@ -5,18 +5,112 @@ Addresses the "docker command not found in container" issue and provides compreh
 """
 
 import subprocess
+import grp
+import http.client
 import json
 import os
+import pwd
 import shutil
+import socket
+import stat
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 
+DOCKER_SOCKET = "/var/run/docker.sock"
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP/1.1 keep-alive connection to the Docker daemon over its Unix socket"""
+    
+    def __init__(self, path, timeout=15):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+    
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+def _docker_api_get(conn, path):
+    """GET a Docker Engine API path and decode the JSON body"""
+    conn.request("GET", path)
+    response = conn.getresponse()
+    body = response.read()
+    if response.status != 200:
+        raise OSError(f"Docker API {path} returned HTTP {response.status}")
+    return json.loads(body)
+
+def _format_ports(ports):
+    """Render API port bindings the way 'docker ps' prints them"""
+    rendered = []
+    for port in ports or []:
+        if port.get("PublicPort"):
+            rendered.append(f"{port.get('IP', '')}:{port['PublicPort']}->{port['PrivatePort']}/{port['Type']}")
+        else:
+            rendered.append(f"{port['PrivatePort']}/{port['Type']}")
+    return ", ".join(rendered)
+
+def _cli_style_container(container):
+    """Reshape an API container summary into the 'docker ps --format json' keys"""
+    return {
+        "ID": container["Id"][:12],
+        "Names": ",".join(name.lstrip("/") for name in container.get("Names") or []),
+        "Image": container.get("Image", ""),
+        "Command": container.get("Command", ""),
+        "CreatedAt": datetime.fromtimestamp(container.get("Created", 0), timezone.utc).strftime("%Y-%m-%d %H:%M:%S +0000 UTC"),
+        "State": container.get("State", ""),
+        "Status": container.get("Status", ""),
+        "Ports": _format_ports(container.get("Ports")),
+        "Networks": ",".join(((container.get("NetworkSettings") or {}).get("Networks") or {}).keys()),
+        "Labels": ",".join(f"{k}={v}" for k, v in (container.get("Labels") or {}).items())
+    }
+
+def _container_info_from_api(socket_path=DOCKER_SOCKET):
+    """Container inventory and daemon info over one socket connection, no CLI processes"""
+    conn = _UnixHTTPConnection(socket_path)
+    try:
+        all_containers = [_cli_style_container(c) for c in _docker_api_get(conn, "/containers/json?all=1")]
+        return {
+            "running_containers": [c for c in all_containers if c["State"] == "running"],
+            "all_containers": all_containers,
+            "system_info": _docker_api_get(conn, "/info"),
+            "source": "docker_api"
+        }
+    finally:
+        conn.close()
+
+@lru_cache(maxsize=1)
+def _current_user():
+    """passwd entry for our uid; NSS lookups (sssd/ldap) can be slow, so do it once"""
+    return pwd.getpwuid(os.getuid())
+
+@lru_cache(maxsize=1)
+def _docker_group():
+    """The docker group entry, or None when it does not exist; looked up once per process"""
+    try:
+        return grp.getgrnam("docker")
+    except KeyError:
+        return None
+
+def _mode_allows(st, user_bit, group_bit, other_bit):
+    """Permission check from an existing stat result, mirroring os.access without another syscall"""
+    uid = os.geteuid()
+    if uid == 0:
+        return True
+    if st.st_uid == uid:
+        return bool(st.st_mode & user_bit)
+    if st.st_gid == os.getegid() or st.st_gid in os.getgroups():
+        return bool(st.st_mode & group_bit)
+    return bool(st.st_mode & other_bit)
+
 def check_docker_environment():
     """
     Comprehensive check of Docker environment and access within the container.
     This addresses the core issue where the agent can't execute Docker commands.
     """
     results = {
-        "timestamp": str(subprocess.run(["date"], capture_output=True, text=True).stdout.strip()),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
         "environment_checks": {},
         "docker_access": {},
         "socket_access": {},
@@ -40,16 +134,18 @@ def check_docker_environment():
         return results
     
     # 2. Check Docker socket access
-    socket_path = "/var/run/docker.sock"
-    socket_exists = os.path.exists(socket_path)
+    try:
+        socket_stat = os.stat(DOCKER_SOCKET)
+    except FileNotFoundError:
+        socket_stat = None
+    socket_exists = socket_stat is not None
     results["socket_access"]["socket_exists"] = socket_exists
     
     if socket_exists:
-        socket_stat = os.stat(socket_path)
         results["socket_access"]["socket_permissions"] = oct(socket_stat.st_mode)[-3:]
         results["socket_access"]["socket_group"] = socket_stat.st_gid
-        results["socket_access"]["socket_readable"] = os.access(socket_path, os.R_OK)
-        results["socket_access"]["socket_writable"] = os.access(socket_path, os.W_OK)
+        results["socket_access"]["socket_readable"] = _mode_allows(socket_stat, stat.S_IRUSR, stat.S_IRGRP, stat.S_IROTH)
+        results["socket_access"]["socket_writable"] = _mode_allows(socket_stat, stat.S_IWUSR, stat.S_IWGRP, stat.S_IWOTH)
     else:
         results["suggestions"].append({
             "priority": "critical", 
@@ -59,16 +155,14 @@ def check_docker_environment():
     
     # 3. Check user permissions
     try:
-        import pwd
-        import grp
-        current_user = pwd.getpwuid(os.getuid())
+        current_user = _current_user()
         results["permissions"]["current_user"] = current_user.pw_name
         results["permissions"]["current_uid"] = os.getuid()
         results["permissions"]["current_gid"] = os.getgid()
         
         # Check if user is in docker group
-        try:
-            docker_group = grp.getgrnam("docker")
+        docker_group = _docker_group()
+        if docker_group is not None:
             user_in_docker_group = current_user.pw_name in docker_group.gr_mem or docker_group.gr_gid == os.getgid()
             results["permissions"]["in_docker_group"] = user_in_docker_group
             
@@ -78,7 +172,7 @@ def check_docker_environment():
                     "issue": "User not in docker group",
                     "solution": "Add user to docker group: usermod -aG docker <username>"
                 })
-        except KeyError:
+        else:
             results["permissions"]["docker_group_exists"] = False
             results["suggestions"].append({
                 "priority": "medium",
@@ -89,7 +183,13 @@ def check_docker_environment():
     except Exception as e:
         results["permissions"]["error"] = str(e)
     
-    # 4. Test actual Docker access
+    # 4. Test actual Docker access - the CLI can only reach a local daemon
+    # through the socket, so skip it when that cannot work (unless DOCKER_HOST
+    # points the CLI somewhere else)
+    if not results["socket_access"].get("socket_writable") and not os.environ.get("DOCKER_HOST"):
+        results["docker_access"]["skipped"] = "socket not writable"
+        return results
+    
     try:
         docker_test = subprocess.run([docker_path, "version"], 
                                    capture_output=True, text=True, timeout=10)
@@ -121,10 +221,11 @@ def check_docker_environment():
     
     return results
 
-def diagnose_container_access_issue():
+def diagnose_container_access_issue(env_check=None):
     """
     Specific diagnostic for the 'docker command not found in container' issue.
     This function directly addresses the user's reported problem.
+    Pass an existing check_docker_environment() result to avoid re-running it.
     """
     diagnosis = {
         "issue_description": "Docker command not found in container",
@@ -133,8 +234,9 @@ def diagnose_container_access_issue():
         "solutions": []
     }
     
-    # Run comprehensive environment check
-    env_check = check_docker_environment()
+    # Run comprehensive environment check unless the caller already has one
+    if env_check is None:
+        env_check = check_docker_environment()
     diagnosis["analysis"] = env_check
     
     # Analyze specific failure patterns
@@ -176,44 +278,62 @@ def diagnose_container_access_issue():
     
     return diagnosis
 
-def get_container_information():
+def get_container_information(env_check=None):
     """
     Provide actual container information when Docker is accessible.
     This replaces generic responses with real data.
+    An existing check_docker_environment() result can be passed in to reuse it.
     """
-    # First check if we can access Docker
-    docker_check = check_docker_environment()
+    # Ask the daemon directly when its socket answers - one HTTP connection
+    # instead of a docker CLI process per query, and no CLI needed at all
+    try:
+        container_info = _container_info_from_api()
+    except (OSError, ValueError, http.client.HTTPException):
+        container_info = None
     
-    if not docker_check["environment_checks"]["docker_command_available"]["available"]:
-        return {
-            "error": "Docker CLI not available in container",
-            "diagnostic": diagnose_container_access_issue()
-        }
+    if container_info is None:
+        # Fall back to the CLI; first check if we can access Docker
+        docker_check = env_check if env_check is not None else check_docker_environment()
+        
+        if not docker_check["environment_checks"]["docker_command_available"]["available"]:
+            return {
+                "error": "Docker CLI not available in container",
+                "diagnostic": diagnose_container_access_issue(docker_check)
+            }
+        
+        if not docker_check["socket_access"].get("socket_exists", False):
+            return {
+                "error": "Docker socket not accessible", 
+                "diagnostic": diagnose_container_access_issue(docker_check)
+            }
+        
+        container_info = _container_info_from_cli()
     
-    if not docker_check["socket_access"].get("socket_exists", False):
-        return {
-            "error": "Docker socket not accessible", 
-            "diagnostic": diagnose_container_access_issue()
-        }
+    try:
+        # Get current container ID (if running inside Docker)
+        hostname_result = subprocess.run(["hostname"], capture_output=True, text=True)
+        if hostname_result.returncode == 0:
+            hostname = hostname_result.stdout.strip()
+            container_info["current_hostname"] = hostname
+            
+            # Try to find our own container
+            for container in container_info.get("all_containers", []):
+                if container.get("Names", "").replace("/", "") == hostname or \
+                   container.get("ID", "").startswith(hostname):
+                    container_info["current_container"] = container
+                    break
+        
+    except Exception as e:
+        container_info["error"] = f"Failed to get container information: {e}"
     
-    # If Docker is accessible, get real container information
+    return container_info
+
+def _container_info_from_cli():
+    """Container inventory via the docker CLI"""
     container_info = {}
     
     try:
-        # Get running containers
-        ps_result = subprocess.run(["docker", "ps", "--format", "json"], 
-                                 capture_output=True, text=True, timeout=15)
-        if ps_result.returncode == 0:
-            containers = []
-            for line in ps_result.stdout.strip().split('\n'):
-                if line:
-                    try:
-                        containers.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        pass
-            container_info["running_containers"] = containers
-        
-        # Get all containers
+        # Get all containers once; the running set is a subset of it
         ps_all_result = subprocess.run(["docker", "ps", "-a", "--format", "json"], 
                                      capture_output=True, text=True, timeout=15)
         if ps_all_result.returncode == 0:
@@ -224,6 +344,7 @@ def get_container_information():
                         all_containers.append(json.loads(line))
                     except json.JSONDecodeError:
                         pass
+            container_info["running_containers"] = [c for c in all_containers if c.get("State") == "running"]
             container_info["all_containers"] = all_containers
         
         # Get Docker system info
@@ -235,19 +356,6 @@ def get_container_information():
             except json.JSONDecodeError:
                 container_info["system_info"] = {"raw": info_result.stdout}
         
-        # Get current container ID (if running inside Docker)
-        hostname_result = subprocess.run(["hostname"], capture_output=True, text=True)
-        if hostname_result.returncode == 0:
-            hostname = hostname_result.stdout.strip()
-            container_info["current_hostname"] = hostname
-            
-            # Try to find our own container
-            for container in container_info.get("all_containers", []):
-                if container.get("Names", "").replace("/", "") == hostname or \
-                   container.get("ID", "").startswith(hostname):
-                    container_info["current_container"] = container
-                    break
-        
     except Exception as e:
         container_info["error"] = f"Failed to get container information: {e}"
     
@@ -259,7 +367,7 @@ if __name__ == "__main__":
     print(json.dumps(env_check, indent=2))
     
     print("\n=== Container Access Issue Diagnosis ===")
-    diagnosis = diagnose_container_access_issue()
+    diagnosis = diagnose_container_access_issue(env_check)
     print(json.dumps(diagnosis, indent=2))
     
     print("\n=== Container Information ===")
@@ -13,7 +13,10 @@ Hardware Requirements:
 Package Requirements:
 - Python 3.7+
 - iproute2 package (ip command)
-- iputils-ping for connectivity testing
+- Optional: pyroute2 (read interfaces over netlink instead of parsing ip output)
+- Optional: orjson (faster JSON output)
+- iputils-ping for connectivity testing (only hosts without a TCP port are pinged)
+- Optional: icmplib or fping (ping without spawning iputils-ping)
 - net-tools (optional, for legacy ifconfig)
 - WireGuard tools if VPN analysis needed
 
@@ -23,17 +26,72 @@ System Dependencies:
 - procfs mounted at /proc
 - Network interface drivers loaded
 """
+import asyncio
 import json
 import os
 import time
 import subprocess
+import sys
+import shlex
 import socket
 import re
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from pyroute2 import IPRoute
+except ImportError:
+    IPRoute = None
+
+try:
+    from tasks._reachability import ping_hosts
+except ImportError:  # run as a script from inside tasks/
+    from _reachability import ping_hosts
+
+# Link flag bits in the order 'ip link' prints them
+LINK_FLAGS = (
+    (0x8, 'LOOPBACK'), (0x2, 'BROADCAST'), (0x10, 'POINTOPOINT'), (0x1000, 'MULTICAST'),
+    (0x80, 'NOARP'), (0x200, 'ALLMULTI'), (0x100, 'PROMISC'), (0x20, 'NOTRAILERS'),
+    (0x4, 'DEBUG'), (0x8000, 'DYNAMIC'), (0x4000, 'AUTOMEDIA'), (0x2000, 'PORTSEL'),
+    (0x400, 'MASTER'), (0x800, 'SLAVE'), (0x1, 'UP'), (0x10000, 'LOWER_UP'), (0x20000, 'DORMANT'),
+)
+IFF_UP = 0x1
+IFF_RUNNING = 0x40
+
+# Interface name -> (role, description); exact names first, then prefixes in order
+DOCKER_BRIDGE_ROLE = ('docker_bridge', 'Docker bridge network')
+EXACT_INTERFACE_ROLES = {
+    'lo': ('loopback', 'Loopback interface'),
+}
+PREFIX_INTERFACE_ROLES = (
+    ('wlx', 'external_wifi_adapter', 'External WiFi adapter (likely Netgear A7000)'),
+    ('wlan', 'builtin_wifi', 'Built-in Pi WiFi (likely used for WireGuard)'),
+    ('wg', 'wireguard_tunnel', 'WireGuard VPN tunnel interface'),
+    ('eth', 'ethernet', 'Ethernet interface'),
+    ('end', 'ethernet', 'Ethernet interface'),
+    ('br-', *DOCKER_BRIDGE_ROLE),
+)
+
+# A scan younger than this is reused unless main() is forced (--force)
+SCAN_OUTPUT_PATH = '/app/agent_memory/network_scan.json'
+SCAN_RESULT_TTL = 30  # seconds
+
+# 'ip addr show' text parsing (used when netlink is unavailable)
+IF_LINE_RE = re.compile(r'^(\d+):[ \t]+([^:\n]+):[ \t]+<([^>\n]*)>', re.M)
+ADDR_LINE_RE = re.compile(r'inet6?\s+(\S+)')
+
 def run_command(cmd, timeout=10):
-    """Run shell command with timeout and error handling"""
+    """Run a command with timeout and error handling
+
+    cmd is an argv list; a string is split with shlex. No shell is involved.
+    """
+    if isinstance(cmd, str):
+        cmd = shlex.split(cmd)
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=timeout)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
         return {
             'success': result.returncode == 0,
             'stdout': result.stdout.strip(),
@@ -45,55 +103,120 @@ def run_command(cmd, timeout=10):
     except Exception as e:
         return {'success': False, 'error': str(e), 'stdout': '', 'stderr': ''}
 
-def get_network_interfaces():
-    """Get detailed network interface information"""
+# Commands main() collects in a single shell; each chunk is terminated by a
+# sentinel line carrying that command's exit status
+BATCH_COMMANDS = {
+    'ip_addr': "ip addr show",  # skipped when pyroute2 is available
+    'ip_route': "ip route show",
+    'ip6_route': "ip -6 route show",
+    'wg_show': "wg show",
+    'resolved': "systemctl is-active systemd-resolved",
+}
+BATCH_SENTINEL = "__network_scan_chunk_end__"
+
+def _run_batched(commands=BATCH_COMMANDS, timeout=20):
+    """Run several commands in one shell and split the output per command
+
+    Returns {key: run_command-style result}. One fork/exec of the shell
+    replaces one per command.
+    """
+    script = "\n".join(
+        f"{cmd} 2>/dev/null; printf '\\n{BATCH_SENTINEL} %d\\n' $?" for cmd in commands.values()
+    )
+    batch = run_command(['/bin/sh', '-c', script], timeout=timeout)
+    chunks = batch['stdout'].split(f"{BATCH_SENTINEL} ") if 'error' not in batch else []
+    
+    results = {}
+    for i, key in enumerate(commands):
+        if i >= len(chunks):
+            results[key] = {'success': False, 'error': batch.get('error', 'No output'), 'stdout': '', 'stderr': ''}
+            continue
+        text = chunks[i]
+        if i:  # drop the previous chunk's exit status line
+            text = text.split('\n', 1)[1] if '\n' in text else ''
+        returncode = int(chunks[i + 1].split('\n', 1)[0]) if i + 1 < len(chunks) else -1
+        results[key] = {
+            'success': returncode == 0,
+            'stdout': text.strip(),
+            'stderr': '',
+            'returncode': returncode
+        }
+    return results
+
+def _netlink_interfaces():
+    """Interfaces straight from RTNETLINK, shaped like the 'ip addr show' parse"""
+    interfaces = {}
+    by_index = {}
+    with IPRoute() as ipr:
+        for link in ipr.get_links():
+            if_name = link.get_attr('IFLA_IFNAME')
+            raw = link['flags']
+            flags = [name for bit, name in LINK_FLAGS if raw & bit]
+            if raw & IFF_UP and not raw & IFF_RUNNING:
+                flags.insert(0, 'NO-CARRIER')
+            interfaces[if_name] = by_index[link['index']] = {
+                'name': if_name,
+                'index': link['index'],
+                'flags': flags,
+                'state': 'UP' if raw & IFF_UP else 'DOWN',
+                'addresses': []
+            }
+        for addr in ipr.get_addr():
+            iface = by_index.get(addr['index'])
+            address = addr.get_attr('IFA_ADDRESS')
+            if iface is not None and address:
+                iface['addresses'].append(f"{address}/{addr['prefixlen']}")
+    return interfaces
+
+def get_network_interfaces(cmd_result=None):
+    """Get detailed network interface information
+
+    Uses netlink via pyroute2 when available; otherwise parses 'ip addr show'.
+    cmd_result: an already collected 'ip addr show' result (see _run_batched)
+    """
+    if IPRoute is not None and cmd_result is None:
+        try:
+            return _netlink_interfaces()
+        except Exception:
+            pass  # no netlink access here; fall back to the ip command
+    
     interfaces = {}
     
     # Get interface details with ip command
-    cmd_result = run_command("ip addr show")
+    if cmd_result is None:
+        cmd_result = run_command(['ip', 'addr', 'show'])
     if cmd_result['success']:
-        current_interface = None
-        for line in cmd_result['stdout'].split('\n'):
-            # Parse interface header (e.g., "3: wlan0: <BROADCAST,MULTICAST,UP,LOWER_UP>")
-            if_match = re.match(r'^(\d+):\s+([^:]+):\s+<([^>]+)>', line)
-            if if_match:
-                if_name = if_match.group(2).strip()
-                flags = if_match.group(3).split(',')
-                interfaces[if_name] = {
-                    'name': if_name,
-                    'index': int(if_match.group(1)),
-                    'flags': flags,
-                    'state': 'UP' if 'UP' in flags else 'DOWN',
-                    'addresses': []
-                }
-                current_interface = if_name
-            # Parse IP addresses
-            elif current_interface and 'inet' in line:
-                addr_match = re.search(r'inet6?\s+([^\s]+)', line)
-                if addr_match:
-                    interfaces[current_interface]['addresses'].append(addr_match.group(1))
-    
-    # Get additional interface statistics
-    cmd_result = run_command("ip -s link show")
-    if cmd_result['success']:
-        # Parse interface statistics if needed
-        pass
+        stdout = cmd_result['stdout']
+        # Scan interface headers (e.g., "3: wlan0: <BROADCAST,MULTICAST,UP,LOWER_UP>")
+        # in place; each interface's addresses lie between its header and the next
+        headers = list(IF_LINE_RE.finditer(stdout))
+        for i, if_match in enumerate(headers):
+            block_end = headers[i + 1].start() if i + 1 < len(headers) else len(stdout)
+            if_name = if_match.group(2).strip()
+            flags = if_match.group(3).split(',')
+            interfaces[if_name] = {
+                'name': if_name,
+                'index': int(if_match.group(1)),
+                'flags': flags,
+                'state': 'UP' if 'UP' in flags else 'DOWN',
+                'addresses': ADDR_LINE_RE.findall(stdout, if_match.end(), block_end)
+            }
     
     return interfaces
 
-def get_routing_table():
-    """Get routing table information"""
+def get_routing_table(ipv4_result=None, ipv6_result=None):
+    """Get routing table information, optionally from already collected command results"""
     routes = {'ipv4': [], 'ipv6': []}
     
     # IPv4 routes
-    cmd_result = run_command("ip route show")
+    cmd_result = ipv4_result if ipv4_result is not None else run_command(['ip', 'route', 'show'])
     if cmd_result['success']:
         for line in cmd_result['stdout'].split('\n'):
             if line.strip():
                 routes['ipv4'].append(line.strip())
     
     # IPv6 routes
-    cmd_result = run_command("ip -6 route show")
+    cmd_result = ipv6_result if ipv6_result is not None else run_command(['ip', '-6', 'route', 'show'])
     if cmd_result['success']:
         for line in cmd_result['stdout'].split('\n'):
             if line.strip():
@@ -101,47 +224,65 @@ def get_routing_table():
     
     return routes
 
-def get_wireguard_status():
-    """Get WireGuard tunnel information"""
+def _wg_on_interface(value, state):
+    """Start a new interface block, flushing the previous one"""
+    if state['current']:
+        state['interfaces'].append(state['current'])
+    state['current'] = {'name': value, 'peers': []}
+
+def _wg_on_peer(value, state):
+    """Record a peer under the current interface"""
+    if state['current'] is not None:
+        state['current']['peers'].append({'public_key': value})
+
+def _wg_on_allowed_ips(value, state):
+    """Attach allowed IPs to the most recent peer"""
+    if state['current'] is not None and state['current']['peers']:
+        state['current']['peers'][-1]['allowed_ips'] = value
+
+# 'wg show' line tag -> handler
+WG_LINE_HANDLERS = {
+    'interface': _wg_on_interface,
+    'peer': _wg_on_peer,
+    'allowed ips': _wg_on_allowed_ips,
+}
+
+def get_wireguard_status(cmd_result=None):
+    """Get WireGuard tunnel information, optionally from an already collected 'wg show' result"""
     wg_status = {'active': False, 'interfaces': []}
     
-    cmd_result = run_command("wg show")
+    if cmd_result is None:
+        cmd_result = run_command(['wg', 'show'])
     if cmd_result['success'] and cmd_result['stdout']:
         wg_status['active'] = True
-        current_interface = None
-        interface_data = {}
+        state = {'current': None, 'interfaces': wg_status['interfaces']}
         
         for line in cmd_result['stdout'].split('\n'):
-            if line.startswith('interface:'):
-                if current_interface and interface_data:
-                    wg_status['interfaces'].append(interface_data)
-                current_interface = line.split(':', 1)[1].strip()
-                interface_data = {'name': current_interface, 'peers': []}
-            elif line.startswith('peer:'):
-                peer_key = line.split(':', 1)[1].strip()
-                interface_data['peers'].append({'public_key': peer_key})
-            elif line.strip().startswith('allowed ips:'):
-                if interface_data['peers']:
-                    interface_data['peers'][-1]['allowed_ips'] = line.split(':', 1)[1].strip()
+            tag, sep, value = line.partition(':')
+            handler = WG_LINE_HANDLERS.get(tag.strip()) if sep else None
+            if handler:
+                handler(value.strip(), state)
         
-        if current_interface and interface_data:
-            wg_status['interfaces'].append(interface_data)
+        if state['current']:
+            wg_status['interfaces'].append(state['current'])
     
     return wg_status
 
-def get_dns_configuration():
-    """Get DNS configuration"""
+def get_dns_configuration(resolved_result=None):
+    """Get DNS configuration, optionally from an already collected systemd-resolved check"""
     dns_config = {'resolv_conf': [], 'systemd_resolved': False}
     
     # Read /etc/resolv.conf
     try:
-        with open('/etc/resolv.conf', 'r') as f:
-            dns_config['resolv_conf'] = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        with open('/etc/resolv.conf', 'r', errors='ignore') as f:
+            text = f.read()
+        dns_config['resolv_conf'] = [line for line in (raw.strip() for raw in text.splitlines())
+                                     if line and not line.startswith('#')]
     except FileNotFoundError:
         pass
     
     # Check systemd-resolved status
-    cmd_result = run_command("systemctl is-active systemd-resolved")
+    cmd_result = resolved_result if resolved_result is not None else run_command(['systemctl', 'is-active', 'systemd-resolved'])
     dns_config['systemd_resolved'] = cmd_result['success'] and cmd_result['stdout'] == 'active'
     
     return dns_config
@@ -155,56 +296,53 @@ def test_connectivity():
         {'name': 'GitHub', 'host': 'github.com', 'port': 443},
     ]
     
-    connectivity = []
-    for target in test_targets:
+    async def probe(target):
         result = {'name': target['name'], 'host': target['host']}
         
         if target['port']:
-            # Test TCP connectivity
+            # A TCP connect answers reachability without spawning ping
             try:
-                sock = socket.create_connection((target['host'], target['port']), timeout=5)
-                sock.close()
+                _, writer = await asyncio.wait_for(asyncio.open_connection(target['host'], target['port']), 5)
+                writer.close()
                 result['tcp_reachable'] = True
             except Exception:
                 result['tcp_reachable'] = False
+            return result
         
-        # Test ping
-        ping_result = run_command(f"ping -c 2 -W 3 {target['host']}")
-        result['ping_reachable'] = ping_result['success']
-        
-        connectivity.append(result)
+        # No known open port (e.g. the gateway), so fall back to ICMP
+        pings = await ping_hosts([target['host']])
+        result['ping_reachable'] = pings[target['host']]['success']
+        return result
+    
+    async def probe_all():
+        return await asyncio.gather(*(probe(target) for target in test_targets))
     
-    return connectivity
+    # Targets are independent, so total wait is the slowest probe, not the sum
+    return list(asyncio.run(probe_all()))
 
-def analyze_interface_roles():
-    """Analyze which interfaces are used for what purposes"""
-    interfaces = get_network_interfaces()
-    analysis = {}
+def _classify_interface(if_name):
+    """Return (role, details) for an interface name"""
+    exact = EXACT_INTERFACE_ROLES.get(if_name)
+    if exact:
+        return exact[0], {'description': exact[1]}
+    for prefix, role, description in PREFIX_INTERFACE_ROLES:
+        if if_name.startswith(prefix):
+            return role, {'description': description}
+    if 'docker' in if_name:
+        return DOCKER_BRIDGE_ROLE[0], {'description': DOCKER_BRIDGE_ROLE[1]}
+    return 'unknown', {}
+
+def analyze_interface_roles(interfaces=None):
+    """Analyze which interfaces are used for what purposes
+
+    interfaces: an existing get_network_interfaces() result; scanned if omitted
+    """
+    if interfaces is None:
+        interfaces = get_network_interfaces()
     
+    analysis = {}
     for if_name, if_data in interfaces.items():
-        role = 'unknown'
-        details = {}
-        
-        if if_name.startswith('wlan'):
-            if 'wlx' in if_name:
-                role = 'external_wifi_adapter'
-                details['description'] = 'External WiFi adapter (likely Netgear A7000)'
-            else:
-                role = 'builtin_wifi'
-                details['description'] = 'Built-in Pi WiFi (likely used for WireGuard)'
-        elif if_name.startswith('wg'):
-            role = 'wireguard_tunnel'
-            details['description'] = 'WireGuard VPN tunnel interface'
-        elif if_name.startswith('eth') or if_name.startswith('end'):
-            role = 'ethernet'
-            details['description'] = 'Ethernet interface'
-        elif if_name.startswith('br-') or 'docker' in if_name:
-            role = 'docker_bridge'
-            details['description'] = 'Docker bridge network'
-        elif if_name == 'lo':
-            role = 'loopback'
-            details['description'] = 'Loopback interface'
-        
+        role, details = _classify_interface(if_name)
         analysis[if_name] = {
             'role': role,
             'state': if_data['state'],
@@ -214,32 +352,61 @@ def analyze_interface_roles():
     
     return analysis
 
-def main():
-    """Main function to collect all network diagnostic information"""
+def main(force=None):
+    """Main function to collect all network diagnostic information
+
+    force: rescan even if the last scan is younger than SCAN_RESULT_TTL;
+    defaults to whether --force was passed on the command line
+    """
+    if force is None:
+        force = '--force' in sys.argv[1:]
+    if not force:
+        try:
+            age = time.time() - os.path.getmtime(SCAN_OUTPUT_PATH)
+        except OSError:
+            age = None
+        if age is not None and age < SCAN_RESULT_TTL:
+            print(f"Network scan from {age:.0f}s ago is still fresh; skipping (use --force to rescan)")
+            return
+    
     timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
     
+    # One shell invocation gathers the output of every ip/wg/systemctl command;
+    # interfaces come from netlink instead when pyroute2 is installed
+    commands = BATCH_COMMANDS
+    if IPRoute is not None:
+        commands = {key: cmd for key, cmd in BATCH_COMMANDS.items() if key != 'ip_addr'}
+    batch = _run_batched(commands)
+    
     # Collect all network information
+    interfaces = get_network_interfaces(batch.get('ip_addr'))
     network_data = {
         'timestamp': timestamp,
         'hostname': socket.gethostname(),
-        'interfaces': get_network_interfaces(),
-        'interface_analysis': analyze_interface_roles(),
-        'routing': get_routing_table(),
-        'wireguard': get_wireguard_status(),
-        'dns': get_dns_configuration(),
+        'interfaces': interfaces,
+        'interface_analysis': analyze_interface_roles(interfaces),
+        'routing': get_routing_table(batch['ip_route'], batch['ip6_route']),
+        'wireguard': get_wireguard_status(batch['wg_show']),
+        'dns': get_dns_configuration(batch['resolved']),
         'connectivity': test_connectivity(),
     }
     
     # Save to agent memory
     os.makedirs('/app/agent_memory', exist_ok=True)
-    with open('/app/agent_memory/network_scan.json', 'w') as f:
-        json.dump(network_data, f, indent=2)
+    # Write beside the target and rename over it so readers never see a partial file
+    output_path = SCAN_OUTPUT_PATH
+    with open(output_path + '.tmp', 'wb') as f:
+        if orjson is not None:
+            f.write(orjson.dumps(network_data, option=orjson.OPT_INDENT_2))
+        else:
+            f.write(json.dumps(network_data, indent=2).encode('utf-8'))
+    os.replace(output_path + '.tmp', output_path)
     
     # Print summary for agent logs
     print(f"Network scan completed at {timestamp}")
     print(f"Active interfaces: {len([i for i in network_data['interfaces'].values() if i['state'] == 'UP'])}")
     print(f"WireGuard active: {network_data['wireguard']['active']}")
-    print(f"Connectivity tests passed: {len([t for t in network_data['connectivity'] if t.get('ping_reachable', False)])}/{len(network_data['connectivity'])}")
+    print(f"Connectivity tests passed: {len([t for t in network_data['connectivity'] if t.get('tcp_reachable') or t.get('ping_reachable')])}/{len(network_data['connectivity'])}")
 
 if __name__ == "__main__":
     main()
@@ -14,6 +14,9 @@ Hardware Requirements:
 Package Requirements:
 - Python 3.7+
 - Standard system tools: ping, nslookup, ip, iptables
+- Optional: aiodns (DNS checks without spawning nslookup)
+- Optional: icmplib (gateway and peer pings without spawning ping)
+- Optional: orjson (faster JSON output)
 - WireGuard tools: wg, wg-quick (wireguard-tools package)
 - Network utilities: systemctl, ufw (optional)
 - Docker (if running containerized services)
@@ -31,16 +34,49 @@ Network Architecture Notes:
 - Split tunneling configuration: Only specific traffic routed through VPN
 - Local services remain accessible through home network adapter
 """
+import asyncio
 import json
 import os
 import time
 import subprocess
+import sys
+import shlex
 import socket
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import aiodns
+except ImportError:
+    aiodns = None
+
+try:
+    from tasks._reachability import host_reachable
+except ImportError:  # run as a script from inside tasks/
+    from _reachability import host_reachable
+
+# Results younger than this are reused unless main() is forced (--force) or a
+# newer network scan has been written since
+NETWORK_SCAN_PATH = '/app/agent_memory/network_scan.json'
+TROUBLESHOOTING_OUTPUT_PATH = '/app/agent_memory/network_troubleshooting.json'
+RESULT_TTL = 30  # seconds
+
+# Interface roles (from the network scan) this dual-adapter setup should have, in report order
+EXPECTED_INTERFACE_ROLES = ('external_wifi_adapter', 'builtin_wifi', 'wireguard_tunnel')
 
 def run_command(cmd, timeout=10):
-    """Run shell command with timeout and error handling"""
+    """Run a command with timeout and error handling
+
+    cmd is an argv list; a string is split with shlex. No shell is involved.
+    """
+    if isinstance(cmd, str):
+        cmd = shlex.split(cmd)
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=timeout)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
         return {
             'success': result.returncode == 0,
             'stdout': result.stdout.strip(),
@@ -59,12 +95,8 @@ def diagnose_dns_issues():
     
     # Test DNS servers
     dns_servers = ['8.8.8.8', '1.1.1.1', '192.168.0.1']
-    working_dns = []
     
-    for dns_server in dns_servers:
-        result = run_command(f"nslookup github.com {dns_server}")
-        if result['success'] and 'github.com' in result['stdout']:
-            working_dns.append(dns_server)
+    working_dns, system_addresses = asyncio.run(_probe_dns_async(dns_servers))
     
     if not working_dns:
         issues.append("No DNS servers are responding")
@@ -74,8 +106,7 @@ def diagnose_dns_issues():
         recommendations.append(f"Consider using working DNS servers: {working_dns}")
     
     # Check for DNS hijacking
-    result = run_command("nslookup github.com")
-    if result['success'] and '10.0.0.2' in result['stdout']:
+    if '10.0.0.2' in system_addresses:
         issues.append("DNS appears to be hijacked - github.com resolving to VPN peer IP")
         recommendations.append("Check /etc/hosts file and DNS configuration")
     
@@ -85,13 +116,69 @@ def diagnose_dns_issues():
         'working_dns_servers': working_dns
     }
 
+async def dns_probe(domain, server, timeout=5):
+    """Resolve domain via one server; same result shape as run_command
+
+    With aiodns the A query goes out as a UDP packet from this process;
+    without it we fall back to one nslookup process per server.
+    """
+    if aiodns is None:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                'nslookup', domain, server,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            return {'success': False, 'error': str(e), 'stdout': '', 'stderr': ''}
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return {'success': False, 'error': 'Command timeout', 'stdout': '', 'stderr': ''}
+        return {
+            'success': proc.returncode == 0,
+            'stdout': stdout.decode(errors='replace').strip(),
+            'stderr': stderr.decode(errors='replace').strip(),
+            'returncode': proc.returncode
+        }
+    
+    resolver = aiodns.DNSResolver(nameservers=[server], timeout=timeout, tries=1)
+    try:
+        answers = await asyncio.wait_for(resolver.query(domain, 'A'), timeout)
+        addresses = [answer.host for answer in answers]
+        return {'success': True, 'stdout': '\n'.join(addresses), 'stderr': '', 'addresses': addresses}
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'stdout': '', 'stderr': str(e)}
+
+async def _system_resolve_github():
+    """github.com addresses from the libc resolver (honours /etc/hosts); None on failure"""
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo('github.com', None, type=socket.SOCK_STREAM)
+    except OSError:
+        return None
+    return [info[4][0] for info in infos]
+
+async def _probe_dns_async(dns_servers):
+    """Query every server plus the system resolver at once
+
+    Per-server queries go through dns_probe (aiodns, else nslookup) side by
+    side; the system lookup uses getaddrinfo either way.
+    Returns (working_servers, system_resolver_addresses_text).
+    """
+    *per_server, system = await asyncio.gather(
+        *(dns_probe('github.com', server) for server in dns_servers), _system_resolve_github()
+    )
+    working = [server for server, result in zip(dns_servers, per_server) if result['success']]
+    return working, "\n".join(system or [])
+
 def diagnose_routing_issues():
     """Diagnose routing and gateway problems"""
     issues = []
     recommendations = []
     
     # Check default routes
-    result = run_command("ip route show default")
+    result = run_command(['ip', 'route', 'show', 'default'])
     if not result['success'] or not result['stdout']:
         issues.append("No default route found")
         recommendations.append("Configure default gateway")
@@ -103,8 +190,7 @@ def diagnose_routing_issues():
             recommendations.append("Consider consolidating or prioritizing routes")
     
     # Test gateway connectivity
-    gateway_result = run_command("ping -c 2 192.168.0.1")
-    if not gateway_result['success']:
+    if not host_reachable("192.168.0.1"):
         issues.append("Cannot reach default gateway (192.168.0.1)")
         recommendations.append("Check physical network connection and gateway configuration")
     
@@ -119,7 +205,7 @@ def diagnose_wireguard_issues():
     recommendations = []
     
     # Check WireGuard status
-    wg_result = run_command("wg show")
+    wg_result = run_command(['wg', 'show'])
     if not wg_result['success'] or not wg_result['stdout']:
         issues.append("WireGuard is not running")
         recommendations.append("Start WireGuard with: sudo wg-quick up wg0")
@@ -138,8 +224,7 @@ def diagnose_wireguard_issues():
             recommendations.append("Consider split tunneling for local network access")
     
     # Test VPN connectivity
-    wg_ping = run_command("ping -c 2 10.0.0.2")
-    if not wg_ping['success']:
+    if not host_reachable("10.0.0.2"):
         issues.append("Cannot reach WireGuard peer")
         recommendations.append("Check WireGuard configuration and network connectivity")
     
@@ -154,7 +239,7 @@ def diagnose_firewall_issues():
     recommendations = []
     
     # Check UFW status
-    ufw_result = run_command("sudo ufw status")
+    ufw_result = run_command(['sudo', 'ufw', 'status'])
     if ufw_result['success'] and 'Status: active' in ufw_result['stdout']:
         # Check for overly restrictive rules
         if 'DENY OUT' in ufw_result['stdout']:
@@ -162,7 +247,7 @@ def diagnose_firewall_issues():
             recommendations.append("Review UFW rules: sudo ufw status verbose")
     
     # Check for Docker iptables conflicts
-    iptables_result = run_command("sudo iptables -L DOCKER")
+    iptables_result = run_command(['sudo', 'iptables', '-L', 'DOCKER'])
     if not iptables_result['success']:
         issues.append("Docker iptables chain missing")
         recommendations.append("Restart Docker service or rebuild iptables chains")
@@ -179,16 +264,16 @@ def diagnose_interface_issues():
     
     # Load previous network scan
     try:
-        with open('/app/agent_memory/network_scan.json', 'r') as f:
-            network_data = json.load(f)
+        with open(NETWORK_SCAN_PATH, 'rb') as f:
+            raw = f.read()
+        network_data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         
         interface_analysis = network_data.get('interface_analysis', {})
         
         # Check for expected interfaces
-        expected_roles = ['external_wifi_adapter', 'builtin_wifi', 'wireguard_tunnel']
-        found_roles = [data['role'] for data in interface_analysis.values()]
+        found_roles = {data['role'] for data in interface_analysis.values()}
         
-        for role in expected_roles:
+        for role in EXPECTED_INTERFACE_ROLES:
             if role not in found_roles:
                 if role == 'external_wifi_adapter':
                     issues.append("External WiFi adapter (Netgear A7000) not detected")
@@ -199,7 +284,7 @@ def diagnose_interface_issues():
         
         # Check interface states
         for if_name, data in interface_analysis.items():
-            if data['role'] in expected_roles and data['state'] == 'DOWN':
+            if data['role'] in EXPECTED_INTERFACE_ROLES and data['state'] == 'DOWN':
                 issues.append(f"Expected interface {if_name} ({data['role']}) is DOWN")
                 recommendations.append(f"Bring up interface: sudo ip link set {if_name} up")
     
@@ -226,21 +311,50 @@ def generate_user_questions():
     ]
     return questions
 
-def main():
-    """Main troubleshooting function"""
+def _previous_result_fresh():
+    """True if the last troubleshooting run is within RESULT_TTL and no newer scan exists"""
+    try:
+        result_mtime = os.path.getmtime(TROUBLESHOOTING_OUTPUT_PATH)
+    except OSError:
+        return False
+    if time.time() - result_mtime >= RESULT_TTL:
+        return False
+    try:
+        return os.path.getmtime(NETWORK_SCAN_PATH) <= result_mtime
+    except OSError:
+        return True
+
+def main(force=None):
+    """Main troubleshooting function
+
+    force: rerun even if the previous results are still fresh;
+    defaults to whether --force was passed on the command line
+    """
+    if force is None:
+        force = '--force' in sys.argv[1:]
+    if not force and _previous_result_fresh():
+        print("Network troubleshooting results are still fresh; skipping (use --force to rerun)")
+        return
+    
     timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
     
-    # Run all diagnostic checks
+    # Run all diagnostic checks - each one mostly waits on child processes,
+    # so running them side by side costs the slowest check, not the sum
+    checks = [
+        ('dns', diagnose_dns_issues),
+        ('routing', diagnose_routing_issues),
+        ('wireguard', diagnose_wireguard_issues),
+        ('firewall', diagnose_firewall_issues),
+        ('interfaces', diagnose_interface_issues),
+    ]
     diagnostics = {
         'timestamp': timestamp,
-        'hostname': socket.gethostname(),
-        'dns': diagnose_dns_issues(),
-        'routing': diagnose_routing_issues(),
-        'wireguard': diagnose_wireguard_issues(),
-        'firewall': diagnose_firewall_issues(),
-        'interfaces': diagnose_interface_issues(),
-        'user_questions': generate_user_questions()
+        'hostname': socket.gethostname()
     }
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = {name: executor.submit(check) for name, check in checks}
+        diagnostics.update({name: future.result() for name, future in futures.items()})
+    diagnostics['user_questions'] = generate_user_questions()
     
     # Compile overall assessment
     all_issues = []
@@ -260,8 +374,14 @@ def main():
     
     # Save results
     os.makedirs('/app/agent_memory', exist_ok=True)
-    with open('/app/agent_memory/network_troubleshooting.json', 'w') as f:
-        json.dump(diagnostics, f, indent=2)
+    # Write beside the target and rename over it so readers never see a partial file
+    output_path = TROUBLESHOOTING_OUTPUT_PATH
+    with open(output_path + '.tmp', 'wb') as f:
+        if orjson is not None:
+            f.write(orjson.dumps(diagnostics, option=orjson.OPT_INDENT_2))
+        else:
+            f.write(json.dumps(diagnostics, indent=2).encode('utf-8'))
+    os.replace(output_path + '.tmp', output_path)
     
     # Print summary
     print(f"Network troubleshooting completed at {timestamp}")
@@ -12,6 +12,7 @@ Hardware Requirements:
 
 Package Requirements:
 - Python 3.7+
+- Optional: orjson (faster JSON output)
 - Standard system utilities: ps, systemctl, ip, lsusb (optional)
 - Access to configuration files in /etc directory
 - Reading permissions for system information files
@@ -26,108 +27,177 @@ import json
 import os
 import time
 import subprocess
+import shlex
 import socket
-import re
 import glob
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from tasks._net_cache import get_ip_json
+except ImportError:  # run as a script from inside tasks/
+    from _net_cache import get_ip_json
+
 def run_command(cmd, timeout=10):
-    """Run system command safely"""
+    """Run system command safely
+
+    cmd is an argv list; a string is split with shlex. No shell is involved.
+    """
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=timeout)
+        if isinstance(cmd, str):
+            cmd = shlex.split(cmd)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
         return {
             'success': result.returncode == 0,
             'stdout': result.stdout.strip(),
             'stderr': result.stderr.strip()
         }
-    except:
+    except (OSError, subprocess.SubprocessError, ValueError):
+        # missing binary, timeout, or an unsplittable command string
         return {'success': False, 'stdout': '', 'stderr': ''}
 
-def discover_hardware_configuration():
+def report_timestamp():
+    """Current UTC time in the discovery document's format"""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+# path -> (mtime, parsed value) for files that rarely or never change
+_file_cache = {}
+
+def _cached_read(path, parser, static=False, first_line=False):
+    """parser(file text), re-read only when the file's mtime changes
+
+    static: the file never changes while the system is up (e.g. /proc/cpuinfo),
+    so the first result is kept without even a stat.
+    first_line: only the first line is needed; skip reading the rest.
+    Raises OSError like open().
+    """
+    cached = _file_cache.get(path)
+    if static and cached:
+        return cached[1]
+    mtime = None if static else os.stat(path).st_mtime_ns
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'r') as f:
+        value = parser(f.readline() if first_line else f.read())
+    _file_cache[path] = (mtime, value)
+    return value
+
+def _parse_cpuinfo(cpuinfo):
+    """(system_type, specifications) from /proc/cpuinfo text"""
+    specifications = {}
+    if 'Raspberry Pi' in cpuinfo:
+        system_type = 'raspberry_pi'
+        if 'Pi 4' in cpuinfo:
+            specifications['model'] = 'Raspberry Pi 4'
+            specifications['architecture'] = 'ARM64'
+    elif 'ARM' in cpuinfo:
+        system_type = 'arm_system'
+    else:
+        system_type = 'x86_system'
+    return system_type, specifications
+
+def _parse_mem_total_mb(first_line):
+    """MemTotal in MB from the first line of /proc/meminfo (where Linux always puts it), or None"""
+    fields = first_line.split()
+    if len(fields) >= 2 and fields[0] == 'MemTotal:':
+        return int(fields[1]) // 1024
+    return None
+
+def _parse_nameservers(resolv_content):
+    """nameserver addresses from resolv.conf text"""
+    entries = (line.split() for line in resolv_content.splitlines() if line.startswith('nameserver'))
+    return [fields[1] for fields in entries if len(fields) > 1]
+
+def _interface_names():
+    """Names of all network interfaces, from 'ip -j address' or, failing that, 'ip link show'"""
+    links = get_ip_json()
+    if links is not None:
+        return [link['ifname'] for link in links if 'ifname' in link]
+    
+    names = []
+    net_result = run_command(['ip', 'link', 'show'])
+    if net_result['success']:
+        for line in net_result['stdout'].split('\n'):
+            # Header lines look like "3: wlan0: <BROADCAST,...>"; others are indented
+            parts = line.split(':', 2)
+            if len(parts) == 3 and parts[0].isdigit():
+                names.append(parts[1].strip())
+    return names
+
+def discover_hardware_configuration(timestamp=None):
     """Discover and document hardware configuration"""
     hardware = {
-        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'timestamp': timestamp or report_timestamp(),
         'system_type': 'unknown',
         'network_adapters': {},
         'specifications': {}
     }
     
-    # Detect system type
+    # Detect system type (cpuinfo is fixed after boot, so parse it once)
     try:
-        with open('/proc/cpuinfo', 'r') as f:
-            cpuinfo = f.read()
-            if 'Raspberry Pi' in cpuinfo:
-                hardware['system_type'] = 'raspberry_pi'
-                if 'Pi 4' in cpuinfo:
-                    hardware['specifications']['model'] = 'Raspberry Pi 4'
-                    hardware['specifications']['architecture'] = 'ARM64'
-            elif 'ARM' in cpuinfo:
-                hardware['system_type'] = 'arm_system'
-            else:
-                hardware['system_type'] = 'x86_system'
-    except:
+        system_type, specifications = _cached_read('/proc/cpuinfo', _parse_cpuinfo, static=True)
+        hardware['system_type'] = system_type
+        hardware['specifications'].update(specifications)
+    except OSError:
         pass
     
-    # Memory information
+    # Memory information (MemTotal is fixed after boot as well)
     try:
-        with open('/proc/meminfo', 'r') as f:
-            for line in f:
-                if line.startswith('MemTotal:'):
-                    kb = int(line.split()[1])
-                    hardware['specifications']['total_memory_mb'] = kb // 1024
-                    break
-    except:
+        total_memory_mb = _cached_read('/proc/meminfo', _parse_mem_total_mb, static=True, first_line=True)
+        if total_memory_mb is not None:
+            hardware['specifications']['total_memory_mb'] = total_memory_mb
+    except (OSError, ValueError):
         pass
     
     # Network adapter discovery
-    net_result = run_command("ip link show")
-    if net_result['success']:
-        for line in net_result['stdout'].split('\n'):
-            if_match = re.match(r'^\d+:\s+([^:]+):', line)
-            if if_match:
-                if_name = if_match.group(1)
-                adapter_info = {'interface': if_name, 'type': 'unknown', 'purpose': 'unknown'}
-                
-                # Classify adapter based on Pi networking strategy
-                if if_name == 'wlan0':
-                    adapter_info.update({
-                        'type': 'builtin_wifi',
-                        'purpose': 'dedicated_wireguard_tunnel',
-                        'description': 'Built-in Pi WiFi reserved for WireGuard VPN tunnel'
-                    })
-                elif if_name.startswith('wlx'):
-                    adapter_info.update({
-                        'type': 'external_usb_wifi',
-                        'purpose': 'home_network_connection',
-                        'description': 'External USB WiFi adapter (e.g., Netgear A7000) for home network'
-                    })
-                elif if_name.startswith('wg'):
-                    adapter_info.update({
-                        'type': 'wireguard_interface',
-                        'purpose': 'vpn_tunnel',
-                        'description': 'WireGuard VPN tunnel interface'
-                    })
-                elif if_name.startswith('eth') or if_name.startswith('end'):
-                    adapter_info.update({
-                        'type': 'ethernet',
-                        'purpose': 'wired_connection',
-                        'description': 'Ethernet interface (typically unused on this Pi setup)'
-                    })
-                elif if_name.startswith('br-') or 'docker' in if_name:
-                    adapter_info.update({
-                        'type': 'docker_bridge',
-                        'purpose': 'container_networking',
-                        'description': 'Docker container bridge network'
-                    })
-                
-                hardware['network_adapters'][if_name] = adapter_info
+    for if_name in _interface_names():
+        adapter_info = {'interface': if_name, 'type': 'unknown', 'purpose': 'unknown'}
+        
+        # Classify adapter based on Pi networking strategy
+        if if_name == 'wlan0':
+            adapter_info.update({
+                'type': 'builtin_wifi',
+                'purpose': 'dedicated_wireguard_tunnel',
+                'description': 'Built-in Pi WiFi reserved for WireGuard VPN tunnel'
+            })
+        elif if_name.startswith('wlx'):
+            adapter_info.update({
+                'type': 'external_usb_wifi',
+                'purpose': 'home_network_connection',
+                'description': 'External USB WiFi adapter (e.g., Netgear A7000) for home network'
+            })
+        elif if_name.startswith('wg'):
+            adapter_info.update({
+                'type': 'wireguard_interface',
+                'purpose': 'vpn_tunnel',
+                'description': 'WireGuard VPN tunnel interface'
+            })
+        elif if_name.startswith('eth') or if_name.startswith('end'):
+            adapter_info.update({
+                'type': 'ethernet',
+                'purpose': 'wired_connection',
+                'description': 'Ethernet interface (typically unused on this Pi setup)'
+            })
+        elif if_name.startswith('br-') or 'docker' in if_name:
+            adapter_info.update({
+                'type': 'docker_bridge',
+                'purpose': 'container_networking',
+                'description': 'Docker container bridge network'
+            })
+        
+        hardware['network_adapters'][if_name] = adapter_info
     
     return hardware
 
-def discover_network_configuration():
+def discover_network_configuration(timestamp=None):
     """Document current network configuration strategy"""
     network_config = {
-        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'timestamp': timestamp or report_timestamp(),
         'strategy': 'unknown',
         'dns_configuration': {},
         'routing_strategy': {},
@@ -135,11 +205,11 @@ def discover_network_configuration():
     }
     
     # Determine networking strategy
-    interfaces = run_command("ip addr show")
-    if interfaces['success']:
-        has_external_wifi = 'wlx' in interfaces['stdout']
-        has_builtin_wifi = 'wlan0' in interfaces['stdout']
-        has_wireguard = 'wg0' in interfaces['stdout']
+    if_names = _interface_names()
+    if if_names:
+        has_external_wifi = any(name.startswith('wlx') for name in if_names)
+        has_builtin_wifi = 'wlan0' in if_names
+        has_wireguard = 'wg0' in if_names
         
         if has_external_wifi and has_builtin_wifi:
             network_config['strategy'] = 'dual_adapter_separation'
@@ -151,18 +221,14 @@ def discover_network_configuration():
     
     # DNS configuration
     try:
-        with open('/etc/resolv.conf', 'r') as f:
-            resolv_content = f.read()
-            dns_servers = []
-            for line in resolv_content.split('\n'):
-                if line.startswith('nameserver'):
-                    dns_servers.append(line.split()[1])
-            network_config['dns_configuration']['servers'] = dns_servers
-    except:
+        network_config['dns_configuration']['servers'] = list(
+            _cached_read('/etc/resolv.conf', _parse_nameservers)
+        )
+    except (OSError, IndexError):
         pass
     
     # Routing analysis
-    routes = run_command("ip route show default")
+    routes = run_command(['ip', 'route', 'show', 'default'])
     if routes['success']:
         default_routes = routes['stdout'].split('\n')
         network_config['routing_strategy']['default_routes'] = default_routes
@@ -174,53 +240,58 @@ def discover_network_configuration():
             if 'wlx' in route:
                 network_config['routing_strategy']['external_wifi_default'] = True
     
-    # Firewall status
-    ufw_status = run_command("ufw status")
-    if ufw_status['success']:
-        network_config['firewall_status']['ufw_active'] = 'Status: active' in ufw_status['stdout']
+    # Firewall status (ufw status needs root; don't spawn it just to be refused)
+    if os.geteuid() != 0:
+        network_config['firewall_status']['ufw_active'] = 'unknown'
+    else:
+        ufw_status = run_command(['ufw', 'status'])
+        if ufw_status['success']:
+            network_config['firewall_status']['ufw_active'] = 'Status: active' in ufw_status['stdout']
     
     return network_config
 
-def discover_service_configuration():
+def discover_service_configuration(timestamp=None):
     """Document running services and their configurations"""
     services = {
-        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'timestamp': timestamp or report_timestamp(),
         'critical_services': {},
         'docker_services': {},
         'network_services': {}
     }
     
+    # One systemctl call reports every unit, one state per line in argument order;
+    # its exit status is non-zero if any unit is inactive, so go by the lines
+    units = ['wg-quick@wg0', 'docker', 'NetworkManager', 'ssh']
+    unit_status = run_command(['systemctl', 'is-active', *units])
+    states = dict(zip(units, unit_status['stdout'].split('\n')))
+    
     # WireGuard service
-    wg_status = run_command("systemctl is-active wg-quick@wg0")
     services['network_services']['wireguard'] = {
-        'active': wg_status['success'] and wg_status['stdout'] == 'active',
+        'active': states.get('wg-quick@wg0') == 'active',
         'purpose': 'VPN tunnel management'
     }
     
     # Docker service
-    docker_status = run_command("systemctl is-active docker")
     services['critical_services']['docker'] = {
-        'active': docker_status['success'] and docker_status['stdout'] == 'active',
+        'active': states.get('docker') == 'active',
         'purpose': 'Container orchestration for diagnostic agent'
     }
     
     # NetworkManager
-    nm_status = run_command("systemctl is-active NetworkManager")
     services['network_services']['network_manager'] = {
-        'active': nm_status['success'] and nm_status['stdout'] == 'active',
+        'active': states.get('NetworkManager') == 'active',
         'purpose': 'Network connection management'
     }
     
     # SSH service
-    ssh_status = run_command("systemctl is-active ssh")
     services['critical_services']['ssh'] = {
-        'active': ssh_status['success'] and ssh_status['stdout'] == 'active',
+        'active': states.get('ssh') == 'active',
         'purpose': 'Remote access and management'
     }
     
     # Docker containers (if Docker is running)
     if services['critical_services']['docker']['active']:
-        containers = run_command("docker ps --format 'table {{.Names}}\t{{.Image}}\t{{.Status}}'")
+        containers = run_command(['docker', 'ps', '--format', 'table {{.Names}}\t{{.Image}}\t{{.Status}}'])
         if containers['success']:
             container_lines = containers['stdout'].split('\n')[1:]  # Skip header
             for line in container_lines:
@@ -235,10 +306,14 @@ def discover_service_configuration():
     
     return services
 
-def generate_configuration_facts():
-    """Generate key facts about the system configuration"""
+def generate_configuration_facts(timestamp=None):
+    """Generate key facts about the system configuration
+
+    timestamp: shared by every section of this pass; taken now if omitted
+    """
+    timestamp = timestamp or report_timestamp()
     facts = {
-        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'timestamp': timestamp,
         'system_identity': {
             'hostname': socket.gethostname(),
             'role': 'diagnostic_agent_host',
@@ -249,10 +324,15 @@ def generate_configuration_facts():
         'configuration_recommendations': []
     }
     
-    # Gather all configuration data
-    hardware = discover_hardware_configuration()
-    network = discover_network_configuration()
-    services = discover_service_configuration()
+    # Gather all configuration data - the three discoveries read independent
+    # state and mostly wait on ip/systemctl/docker, so run them side by side
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        hardware_future = executor.submit(discover_hardware_configuration, timestamp)
+        network_future = executor.submit(discover_network_configuration, timestamp)
+        services_future = executor.submit(discover_service_configuration, timestamp)
+        hardware = hardware_future.result()
+        network = network_future.result()
+        services = services_future.result()
     
     # Extract key networking facts
     active_adapters = [name for name, data in hardware['network_adapters'].items() 
@@ -292,12 +372,13 @@ def main():
     print("Discovering system configuration...")
     
     # Run all discovery tasks
-    facts, hardware, network, services = generate_configuration_facts()
+    timestamp = report_timestamp()
+    facts, hardware, network, services = generate_configuration_facts(timestamp)
     
     # Create comprehensive configuration document
     configuration_document = {
         'metadata': {
-            'generated_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            'generated_at': timestamp,
             'hostname': socket.gethostname(),
             'document_purpose': 'Agent system configuration knowledge base'
         },
@@ -309,8 +390,14 @@ def main():
     
     # Save configuration document
     os.makedirs('/app/agent_memory', exist_ok=True)
-    with open('/app/agent_memory/system_configuration.json', 'w') as f:
-        json.dump(configuration_document, f, indent=2)
+    # Write beside the target and rename over it so readers never see a partial file
+    output_path = '/app/agent_memory/system_configuration.json'
+    with open(output_path + '.tmp', 'wb') as f:
+        if orjson is not None:
+            f.write(orjson.dumps(configuration_document, option=orjson.OPT_INDENT_2))
+        else:
+            f.write(json.dumps(configuration_document, indent=2).encode('utf-8'))
+    os.replace(output_path + '.tmp', output_path)
     
     # Print summary
     print(f"\n=== SYSTEM CONFIGURATION DISCOVERY COMPLETE ===")
@@ -15,7 +15,8 @@ Design considerations:
 * **Efficiency**: The collector sleeps between cycles and avoids
   expensive operations. It uses Python's standard library where
   possible, falling back on `psutil` if available for more detailed
-  metrics.
+  metrics. The heartbeat file is written as compact JSON (via
+  `orjson` when installed) and swapped in atomically.
 * **Resilience**: All data gathering operations are wrapped in
   `try/except` blocks. When a metric cannot be retrieved, a
   placeholder value such as ``"unavailable"`` is returned instead of
@@ -32,18 +33,20 @@ Example usage::
     # Continue running your main application code...
 
 Note that the thread is marked as a daemon; it will not prevent
-program exit if the main thread finishes.
+program exit if the main thread finishes. Call `stop_heartbeat` for an
+orderly shutdown.
 """
 
 from __future__ import annotations
 
+import fcntl
+import hashlib
 import json
 import os
 import socket
-import subprocess
+import struct
 import threading
 import time
-from datetime import datetime
 from typing import Dict, List, Optional, Union
 
 try:
@@ -53,6 +56,97 @@ try:
 except ImportError:  # pragma: no cover - optional dependency
     psutil = None  # type: ignore
 
+try:
+    # orjson serializes in C; the heartbeat file is rewritten every cycle.
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
+
+try:
+    from tasks._net_cache import get_ip_json
+except ImportError:  # run as a script from inside tasks/
+    from _net_cache import get_ip_json  # type: ignore
+
+
+def _dumps(data: Dict) -> bytes:
+    """
+    Serialize heartbeat data to compact JSON bytes.
+
+    The heartbeat file is machine-read, so no indentation is added.
+    Uses orjson when installed and the standard library otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _read_text(path: str, size: int = 4096) -> str:
+    """
+    Read a small pseudo-file with a single ``read(2)``.
+
+    procfs and sysfs values fit in one page, so a raw ``os.open`` /
+    ``os.read`` pair avoids building a buffered text wrapper for every
+    metric on every heartbeat.
+
+    :param path: File to read.
+    :param size: Upper bound on the bytes read.
+    :returns: The file contents decoded as UTF-8.
+    :raises OSError: If the file cannot be opened or read.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, size).decode("utf-8", "replace")
+    finally:
+        os.close(fd)
+
+
+# path -> descriptor kept open across heartbeats for per-tick metrics
+_pinned_fds: Dict[str, int] = {}
+_pinned_fds_lock = threading.Lock()
+
+
+def _pread_pinned(path: str, size: int = 64) -> str:
+    """
+    Re-read a small pseudo-file through a descriptor kept open.
+
+    procfs and sysfs regenerate their contents on every read at offset
+    0, so one ``os.pread`` per tick returns a fresh value without the
+    path lookup, permission check and close of a new ``open``. A
+    descriptor that has gone bad (e.g. the sensor driver was reloaded)
+    is dropped and the file reopened once.
+
+    :param path: File to read.
+    :param size: Upper bound on the bytes read.
+    :returns: The file contents decoded as UTF-8.
+    :raises OSError: If the file cannot be opened or read.
+    """
+    fd = _pinned_fd(path)
+    try:
+        return os.pread(fd, size, 0).decode("utf-8", "replace")
+    except OSError:
+        _drop_pinned_fd(path)
+    return os.pread(_pinned_fd(path), size, 0).decode("utf-8", "replace")
+
+
+def _pinned_fd(path: str) -> int:
+    """Return the pinned descriptor for ``path``, opening it if needed."""
+    with _pinned_fds_lock:
+        fd = _pinned_fds.get(path)
+        if fd is None:
+            fd = _pinned_fds[path] = os.open(path, os.O_RDONLY)
+        return fd
+
+
+def _drop_pinned_fd(path: str) -> None:
+    """Close and forget the pinned descriptor for ``path``, if any."""
+    with _pinned_fds_lock:
+        fd = _pinned_fds.pop(path, None)
+    if fd is not None:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
 
 def _get_system_uptime() -> Union[float, str]:
     """
@@ -67,15 +161,14 @@ def _get_system_uptime() -> Union[float, str]:
     """
     try:
         # /proc/uptime returns two numbers: uptime and idle time.
-        with open("/proc/uptime", "r", encoding="utf-8") as f:
-            uptime_seconds_str = f.readline().split()[0]
-            return float(uptime_seconds_str)
-    except Exception:
+        uptime_seconds_str = _pread_pinned("/proc/uptime").split()[0]
+        return float(uptime_seconds_str)
+    except (OSError, ValueError, IndexError):
         # Fallback: if psutil is available, derive uptime from boot time
         if psutil is not None:
             try:
                 return float(time.time() - psutil.boot_time())
-            except Exception:
+            except (psutil.Error, OSError):
                 pass
         return "unavailable"
 
@@ -95,10 +188,9 @@ def _get_cpu_temperature() -> Union[float, str]:
     # Try the standard Raspberry Pi thermal zone
     thermal_path = "/sys/class/thermal/thermal_zone0/temp"
     try:
-        with open(thermal_path, "r", encoding="utf-8") as f:
-            milli_celsius = int(f.readline().strip())
-            return milli_celsius / 1000.0
-    except Exception:
+        milli_celsius = int(_pread_pinned(thermal_path).strip())
+        return milli_celsius / 1000.0
+    except (OSError, ValueError):
         # Fallback to psutil if available
         if psutil is not None:
             try:
@@ -109,7 +201,8 @@ def _get_cpu_temperature() -> Union[float, str]:
                         current = getattr(entry, "current", None)
                         if current is not None:
                             return float(current)
-            except Exception:
+            # sensors_temperatures doesn't exist on every platform
+            except (psutil.Error, OSError, AttributeError):
                 pass
         return "unavailable"
 
@@ -118,39 +211,72 @@ def _get_disk_usage() -> Union[Dict[str, Union[int, float]], str]:
     """
     Collect disk usage statistics for the root filesystem.
 
-    Uses `psutil.disk_usage` if available; otherwise falls back to
-    ``os.statvfs``. The returned dictionary contains raw byte counts
-    along with a usage percentage.
+    Calls ``os.statvfs`` directly; this is the same syscall
+    `psutil.disk_usage` makes, without its wrapper objects. Figures
+    follow psutil's definitions (``used`` excludes root-reserved blocks
+    and ``percent`` is relative to the space available to users), so
+    values don't change depending on whether psutil is installed.
 
     :returns: A dictionary with keys ``total``, ``used``, ``free`` and
               ``percent`` describing the disk usage, or ``"unavailable"``
               if metrics cannot be gathered.
     """
     try:
-        if psutil is not None:
-            usage = psutil.disk_usage("/")  # type: ignore
-            return {
-                "total": int(usage.total),
-                "used": int(usage.used),
-                "free": int(usage.free),
-                "percent": float(usage.percent),
-            }
-        # Fallback using os.statvfs
         stat = os.statvfs("/")
         total = stat.f_blocks * stat.f_frsize
-        free = stat.f_bavail * stat.f_bsize
-        used = total - free
-        percent = (used / total * 100.0) if total else 0.0
+        free = stat.f_bavail * stat.f_frsize
+        used = (stat.f_blocks - stat.f_bfree) * stat.f_frsize
+        usable = used + free
+        percent = (used / usable * 100.0) if usable else 0.0
         return {
             "total": int(total),
             "used": int(used),
             "free": int(free),
             "percent": float(percent),
         }
-    except Exception:
+    except OSError:
         return "unavailable"
 
 
+SYS_CLASS_NET = "/sys/class/net"
+IFF_UP = 0x1
+SIOCGIFADDR = 0x8915
+
+
+def _read_sysfs_interfaces() -> Dict[str, Dict[str, Union[List[str], bool]]]:
+    """
+    Read interface state straight from ``/sys/class/net``.
+
+    The up flag comes from each interface's ``flags`` file (the same
+    ``IFF_UP`` bit psutil reports) and the IPv4 address from one
+    ``SIOCGIFADDR`` ioctl on a shared socket, so no getifaddrs walk or
+    subprocess is needed. Only the primary IPv4 address is reported.
+
+    :returns: The same mapping as :func:`_get_network_interfaces`.
+    :raises OSError: If ``/sys/class/net`` cannot be listed.
+    """
+    interfaces: Dict[str, Dict[str, Union[List[str], bool]]] = {}
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for name in os.listdir(SYS_CLASS_NET):
+            try:
+                flags = _read_text(f"{SYS_CLASS_NET}/{name}/flags")
+                is_up = bool(int(flags.strip(), 16) & IFF_UP)
+            except (OSError, ValueError):
+                is_up = False
+            ip_addresses: List[str] = []
+            try:
+                request = struct.pack("256s", name.encode("utf-8")[:15])
+                reply = fcntl.ioctl(sock.fileno(), SIOCGIFADDR, request)
+                ip_addresses.append(socket.inet_ntoa(reply[20:24]))
+            except OSError:
+                pass  # no IPv4 address assigned
+            interfaces[name] = {
+                "ip_addresses": ip_addresses,
+                "is_up": is_up,
+            }
+    return interfaces
+
+
 def _get_network_interfaces() -> Union[Dict[str, Dict[str, Union[List[str], bool]]], str]:
     """
     Gather information about network interfaces.
@@ -158,16 +284,22 @@ def _get_network_interfaces() -> Union[Dict[str, Dict[str, Union[List[str], bool
     Returns a mapping keyed by interface name. Each value contains a
     list of IPv4 addresses and a boolean indicating whether the
     interface is operational (``True`` for up, ``False`` for down).
-    Attempts to use psutil when available, falling back to invoking
-    the ``ip -j address`` command.
+    Reads ``/sys/class/net`` directly on Linux, then tries psutil when
+    available, falling back to invoking the ``ip -j address`` command.
 
     :returns: A dictionary mapping interface names to dictionaries with
               keys ``ip_addresses`` and ``is_up``, or ``"unavailable"``
               if metrics cannot be gathered.
     """
     interfaces: Dict[str, Dict[str, Union[List[str], bool]]] = {}
-    # First attempt to use psutil if it provides detailed interface information
-    if psutil is not None:
+    # sysfs plus one ioctl per interface is the cheapest source on Linux
+    try:
+        interfaces = _read_sysfs_interfaces()
+    except OSError:
+        interfaces = {}
+
+    # Otherwise use psutil if it provides detailed interface information
+    if not interfaces and psutil is not None:
         try:
             addrs = psutil.net_if_addrs()  # type: ignore
             stats = psutil.net_if_stats()  # type: ignore
@@ -183,22 +315,18 @@ def _get_network_interfaces() -> Union[Dict[str, Dict[str, Union[List[str], bool
                     "ip_addresses": ip_addresses,
                     "is_up": is_up,
                 }
-        except Exception:
+        except (psutil.Error, OSError):
             # In case psutil failed, fall back to parsing ip command output
             interfaces = {}
 
     # If no interfaces found via psutil or psutil isn't available, use ip command
     if not interfaces:
         try:
-            # Use 'ip' to fetch JSON formatted interface data. The '-j' flag
-            # tells iproute2 to output JSON, which simplifies parsing.
-            ip_output = subprocess.check_output(
-                ["ip", "-j", "address"],
-                stderr=subprocess.DEVNULL,
-                encoding="utf-8",
-            )
-            parsed: List[Dict[str, Union[str, List]]]
-            parsed = json.loads(ip_output)
+            # Use 'ip -j address' JSON, shared with configuration discovery
+            # through a short-lived cache so one run serves both.
+            parsed: Optional[List[Dict[str, Union[str, List]]]] = get_ip_json("address")
+            if parsed is None:
+                return "unavailable"
             for iface in parsed:
                 name = str(iface.get("ifname", ""))
                 addr_info = iface.get("addr_info", [])
@@ -215,8 +343,8 @@ def _get_network_interfaces() -> Union[Dict[str, Dict[str, Union[List[str], bool
                     "ip_addresses": ip_addresses,
                     "is_up": operstate == "UP",
                 }
-        except Exception:
-            # If everything fails, return unavailable
+        except (AttributeError, TypeError, ValueError):
+            # Unexpectedly shaped ip JSON; report unavailable
             return "unavailable"
     return interfaces
 
@@ -235,6 +363,12 @@ def _collect_heartbeat() -> Dict[str, Union[float, str, Dict]]:
             "last_updated": <ISO 8601 timestamp string>
         }
 
+    The heartbeat loop only rewrites the file when the material state
+    (see ``_heartbeat_fingerprint``) changes. Between rewrites it just
+    refreshes the file's mtime, so in the file ``last_updated`` and
+    ``uptime_seconds`` describe the last material change. Readers
+    checking that the agent is alive should use the file's mtime.
+
     :returns: A dictionary containing metrics and a timestamp.
     """
     return {
@@ -243,13 +377,16 @@ def _collect_heartbeat() -> Dict[str, Union[float, str, Dict]]:
         "disk_usage": _get_disk_usage(),
         "network_interfaces": _get_network_interfaces(),
         # Use UTC ISO8601 format with a trailing 'Z' to denote Zulu time
-        "last_updated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "last_updated": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
     }
 
 
+HEARTBEAT_PATH = "/agent_memory/connectivity.json"
+
+
 def _write_heartbeat_to_file(
     data: Dict[str, Union[float, str, Dict]],
-    filepath: str = "/agent_memory/connectivity.json",
+    filepath: str = HEARTBEAT_PATH,
 ) -> bool:
     """
     Serialize the provided heartbeat data to JSON and write it to a file.
@@ -266,29 +403,121 @@ def _write_heartbeat_to_file(
         directory = os.path.dirname(filepath)
         if directory and not os.path.exists(directory):
             os.makedirs(directory, exist_ok=True)
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        # Write beside the target and rename over it so readers never
+        # observe a partially written heartbeat
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_dumps(data))
+        os.replace(tmp_path, filepath)
         return True
-    except Exception:
-        # In case of any write error, return False
+    except (OSError, TypeError, ValueError):
+        # Write errors, or data that can't be serialized; return False
         return False
 
 
+# Set by stop_heartbeat() to end the heartbeat loop
+_stop = threading.Event()
+
+# Width of the temperature buckets compared by _heartbeat_fingerprint
+TEMPERATURE_BUCKET_CELSIUS = 5
+
+
+def _heartbeat_fingerprint(data: Dict[str, Union[float, str, Dict]]) -> bytes:
+    """
+    Hash the coarse, material state of a heartbeat.
+
+    Only changes a reader would act on count. These are the disk usage
+    percentage rounded to a whole percent, the CPU temperature in
+    ``TEMPERATURE_BUCKET_CELSIUS`` buckets, and the interface
+    addresses and up/down states. The timestamp, uptime, raw disk byte
+    counts and small temperature jitter move every interval and are
+    left out.
+
+    :param data: The heartbeat dictionary returned from
+                 ``_collect_heartbeat``.
+    :returns: A short digest; equal digests mean no material change.
+    """
+    disk = data.get("disk_usage")
+    temperature = data.get("cpu_temperature_celsius")
+    material = {
+        "disk_percent": round(disk["percent"]) if isinstance(disk, dict) else disk,
+        "temperature_bucket": (
+            int(temperature // TEMPERATURE_BUCKET_CELSIUS)
+            if isinstance(temperature, (int, float))
+            else temperature
+        ),
+        "network_interfaces": data.get("network_interfaces"),
+    }
+    return hashlib.blake2b(_dumps(material), digest_size=8).digest()
+
+
+def _touch(filepath: str) -> bool:
+    """
+    Refresh a file's mtime without rewriting it.
+
+    :returns: ``True`` on success, ``False`` if the file is missing or
+              not writable.
+    """
+    try:
+        os.utime(filepath, None)
+        return True
+    except OSError:
+        return False
+
+
+def _heartbeat_tick(
+    last_fingerprint: Optional[bytes],
+    filepath: str = HEARTBEAT_PATH,
+) -> Optional[bytes]:
+    """
+    Collect one heartbeat and publish it.
+
+    The file is rewritten only when the material state differs from
+    ``last_fingerprint``. Otherwise its mtime is refreshed, which saves
+    SD-card writes. If the file cannot be touched (e.g. it was deleted),
+    it is written in full.
+
+    :param last_fingerprint: Fingerprint of the data currently in the
+                             file, or ``None`` if nothing was written.
+    :param filepath: Destination path for the JSON output.
+    :returns: The fingerprint of the data now in the file (unchanged
+              if the write failed).
+    """
+    data = _collect_heartbeat()
+    fingerprint = _heartbeat_fingerprint(data)
+    if fingerprint == last_fingerprint and _touch(filepath):
+        return last_fingerprint
+    if _write_heartbeat_to_file(data, filepath):
+        return fingerprint
+    return last_fingerprint
+
+
 def _heartbeat_loop(interval: int) -> None:
     """
-    Internal loop that continuously collects and writes heartbeat data.
+    Internal loop that continuously collects and publishes heartbeat data.
 
-    :param interval: Number of seconds to wait between each
-                     heartbeat collection. A minimum of 1 second is
-                     enforced to avoid busy looping.
+    See ``_heartbeat_tick`` for when the file is rewritten and when it
+    is only touched.
+
+    :param interval: Number of seconds between the starts of
+                     successive heartbeat collections. A minimum of 1
+                     second is enforced to avoid busy looping.
     """
     # Ensure the interval is at least 1 second
     sleep_interval = max(1, int(interval))
-    while True:
-        data = _collect_heartbeat()
-        _write_heartbeat_to_file(data)
-        # Sleep outside the collection to allow other threads to run
-        time.sleep(sleep_interval)
+    next_tick = time.monotonic()
+    last_fingerprint: Optional[bytes] = None
+    while not _stop.is_set():
+        last_fingerprint = _heartbeat_tick(last_fingerprint)
+        # Schedule against fixed ticks so collection time doesn't add
+        # drift; if a cycle overran, restart the cadence from now
+        next_tick += sleep_interval
+        now = time.monotonic()
+        if next_tick < now:
+            next_tick = now
+        # Waiting on the event (rather than sleeping) lets
+        # stop_heartbeat() end the loop immediately
+        _stop.wait(next_tick - now)
 
 
 def start_heartbeat(interval: int = 60) -> threading.Thread:
@@ -307,6 +536,7 @@ def start_heartbeat(interval: int = 60) -> threading.Thread:
               heartbeat thread. The thread is started before
               returning.
     """
+    _stop.clear()
     # Instantiate the thread as a daemon so it won't block program exit
     thread = threading.Thread(
         target=_heartbeat_loop,
@@ -318,13 +548,30 @@ def start_heartbeat(interval: int = 60) -> threading.Thread:
     return thread
 
 
+def stop_heartbeat() -> None:
+    """
+    Ask the heartbeat thread to exit.
+
+    The thread finishes any collection already in progress and then
+    returns instead of waiting out the rest of its interval. Join the
+    thread returned by :func:`start_heartbeat` to wait for it.
+    """
+    _stop.set()
+
+
 __all__ = [
     "start_heartbeat",
+    "stop_heartbeat",
     # Expose helper functions for testing or advanced usage
     "_collect_heartbeat",
     "_write_heartbeat_to_file",
+    "_heartbeat_fingerprint",
+    "_heartbeat_tick",
+    "_read_text",
+    "_pread_pinned",
     "_get_system_uptime",
     "_get_cpu_temperature",
     "_get_disk_usage",
     "_get_network_interfaces",
+    "_read_sysfs_interfaces",
 ]
\ No newline at end of file
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test the connectivity probe: a stalled SSH name lookup must not make the
+internet probe report unreachable.
+"""
+
+import socket
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tasks import check_connectivity
+
+
+def test_slow_ssh_lookup_does_not_fail_internet_probe():
+    """The internet target still counts when resolving SSH_HOST uses the whole timeout"""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+
+    real_getaddrinfo = socket.getaddrinfo
+
+    def slow_getaddrinfo(host, *args, **kwargs):
+        if host == "slow.invalid":
+            if len(args) >= 5 and args[4] & socket.AI_NUMERICHOST:
+                raise socket.gaierror("not a numeric host")  # never hits DNS
+            time.sleep(2)
+            raise socket.gaierror("timed out")
+        return real_getaddrinfo(host, *args, **kwargs)
+
+    saved = (check_connectivity.INTERNET_TARGET, check_connectivity.SSH_HOST)
+    check_connectivity.INTERNET_TARGET = listener.getsockname()
+    check_connectivity.SSH_HOST = "slow.invalid"
+    socket.getaddrinfo = slow_getaddrinfo
+    try:
+        start = time.monotonic()
+        internet_ok, ssh_ok = check_connectivity.probe_both(timeout=0.5)
+        elapsed = time.monotonic() - start
+    finally:
+        socket.getaddrinfo = real_getaddrinfo
+        check_connectivity.INTERNET_TARGET, check_connectivity.SSH_HOST = saved
+        listener.close()
+
+    assert internet_ok, "internet probe failed because of the SSH lookup"
+    assert not ssh_ok
+    assert elapsed < 1.5, f"resolver stall was not bounded by the timeout ({elapsed:.1f}s)"
+
+
+def main():
+    """Run the connectivity probe tests"""
+    print("Connectivity Probe Tests")
+    print("=" * 50)
+    tests = [test_slow_ssh_lookup_does_not_fail_internet_probe]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+    print(f"\nTests passed: {len(tests) - failures}/{len(tests)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Test the StatsLogger consumer pipeline: queued events are merged and
+persisted on flush, overflow is counted, the stats file rotates past its
+size cap, and history replay reaches into the rotated file.
+"""
+
+import json
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from stats_logger import StatsLogger
+
+
+def _records(path):
+    """Parsed JSONL records in a stats file ([] if it does not exist)"""
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def _stall_consumer(logger):
+    """Make the consumer block inside its next completion; returns (entered, release) events"""
+    entered = threading.Event()
+    release = threading.Event()
+    apply_completion = logger._apply_completion
+
+    def stalled(completion):
+        entered.set()
+        release.wait()
+        return apply_completion(completion)
+
+    logger._apply_completion = stalled
+    return entered, release
+
+
+def test_round_trip_persists_and_leaves_returned_dicts_alone():
+    """start -> complete -> flush writes one merged record; the caller's dicts are untouched"""
+    with tempfile.TemporaryDirectory() as tmp:
+        logger = StatsLogger(tmp)
+        start = logger.log_query_start("q1", "check disk", "local")
+        complete = logger.log_query_complete("q1", "local", 42)
+        start_copy, complete_copy = dict(start), dict(complete)
+
+        assert logger.flush(), "flush timed out"
+
+        assert start == start_copy, "returned start entry was modified"
+        assert complete == complete_copy, "returned completion record was modified"
+        records = _records(logger.stats_file)
+        assert len(records) == 1
+        record = records[0]
+        assert record["query_id"] == "q1"
+        assert record["response_length"] == 42
+        assert record["performance_category"] == "excellent"
+        assert record["duration"] >= 0
+        assert "end_time" not in record
+        assert [e["query_id"] for e in logger._snapshot] == ["q1"]
+
+
+def test_overflow_is_counted_in_dropped_count():
+    """Events past QUEUE_MAXSIZE while the consumer is stuck are evicted and counted"""
+    class SmallQueueLogger(StatsLogger):
+        QUEUE_MAXSIZE = 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logger = SmallQueueLogger(tmp)
+        entered, release = _stall_consumer(logger)
+        logger.log_query_start("blocker", "q", "local")
+        logger.log_query_complete("blocker", "local", 1)
+        assert entered.wait(5), "consumer never picked up the completion"
+
+        for i in range(6):
+            logger.log_query_start(f"q{i}", "q", "local")
+
+        assert logger.dropped_count == 2
+        release.set()
+        assert logger.flush(), "flush timed out"
+
+
+def test_eviction_spares_flush_and_query_starts():
+    """A full queue evicts completions before starts, and a pending flush still returns"""
+    class SmallQueueLogger(StatsLogger):
+        QUEUE_MAXSIZE = 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logger = SmallQueueLogger(tmp)
+        entered, release = _stall_consumer(logger)
+        logger.log_query_start("blocker", "q", "local")
+        logger.log_query_complete("blocker", "local", 1)
+        assert entered.wait(5), "consumer never picked up the completion"
+
+        for i in range(3):
+            logger.log_query_start(f"q{i}", "q", "local")
+        logger.log_query_complete("q0", "local", 1)
+
+        flushed = []
+        flusher = threading.Thread(target=lambda: flushed.append(logger.flush(timeout=5)), daemon=True)
+        flusher.start()
+        try:
+            # Queue is full: this evicts the q0 completion rather than any start
+            logger.log_query_complete("q1", "local", 1)
+            assert [kind for kind, _ in logger._events.queue] == ["start", "start", "start", "complete"]
+        finally:
+            release.set()
+        flusher.join(10)
+        assert flushed == [True], "flush was lost to eviction"
+        assert [e["query_id"] for e in logger._snapshot] == ["blocker", "q1"]
+
+
+def test_rotation_past_size_cap():
+    """A write that takes the file past ROTATE_BYTES moves it to .1 and starts a fresh file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        logger = StatsLogger(tmp)
+        rotated = logger.stats_file.with_name(logger.stats_file.name + ".1")
+
+        logger.log_query_start("q1", "q", "local")
+        logger.log_query_complete("q1", "local", 1)
+        assert logger.flush()
+        # Cap halfway between one and two records (their lengths vary by a few bytes),
+        # so the second write triggers the rotation and the third does not
+        logger.ROTATE_BYTES = logger.stats_file.stat().st_size * 3 // 2
+
+        for query_id in ("q2", "q3"):
+            logger.log_query_start(query_id, "q", "local")
+            logger.log_query_complete(query_id, "local", 1)
+            assert logger.flush()
+
+        assert [r["query_id"] for r in _records(rotated)] == ["q1", "q2"]
+        assert [r["query_id"] for r in _records(logger.stats_file)] == ["q3"]
+
+
+def test_history_replay_fills_window_from_rotated_file():
+    """A nearly empty current file is topped up from the tail of the .1 file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        stats_file = Path(tmp) / "performance_stats.jsonl"
+
+        def write(path, ids):
+            path.write_text("".join(
+                json.dumps({"query_id": str(i), "start_time": i, "duration": 1.0}) + "\n" for i in ids
+            ))
+
+        write(stats_file.with_name(stats_file.name + ".1"), range(1500))
+        write(stats_file, range(1500, 1510))
+
+        assert [r["query_id"] for r in StatsLogger._read_tail(stats_file, 3)] == ["1509", "1508", "1507"]
+
+        logger = StatsLogger(tmp)
+        ids = [e["query_id"] for e in logger.recent_queries]
+        assert len(ids) == logger.recent_queries.maxlen
+        assert ids[0] == "510" and ids[-1] == "1509"
+        assert ids == [str(i) for i in range(510, 1510)]
+
+
+def main():
+    """Run the StatsLogger tests"""
+    print("StatsLogger Pipeline Tests")
+    print("=" * 50)
+    tests = [
+        test_round_trip_persists_and_leaves_returned_dicts_alone,
+        test_overflow_is_counted_in_dropped_count,
+        test_eviction_spares_flush_and_query_starts,
+        test_rotation_past_size_cap,
+        test_history_replay_fills_window_from_rotated_file,
+    ]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+    print(f"\nTests passed: {len(tests) - failures}/{len(tests)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,6 @@ from threading import Timer, Thread
 from pathlib import Path
 import faiss_utils
 import memory
-import subprocess
 import os
 import json
 import re
@@ -1141,19 +1140,16 @@ def _periodic_health_check():
             logger.error(f"Health check failed: {e}")
 
 def _periodic_isa_scripts():
-    """Periodically run ISA scripts"""
+    """Periodically run ISA tasks in-process (imported once, no interpreter respawn per tick)"""
     global shutdown_flag
-    scripts = [
-        os.path.join(BASE_DIR, "tasks", "collect_self_facts.py"),
-        os.path.join(BASE_DIR, "tasks", "check_connectivity.py"),
-        os.path.join(BASE_DIR, "tasks", "scan_processes.py"),
-    ]
+    from tasks import check_connectivity, collect_self_facts, scan_processes
+    isa_tasks = [collect_self_facts, check_connectivity, scan_processes]
     while not shutdown_flag:
-        for script in scripts:
+        for task in isa_tasks:
             try:
-                subprocess.run(["python3", script], check=True)
+                task.run()
             except Exception as e:
-                logger.error(f"ISA script failed: {script} - {e}")
+                logger.error(f"ISA task failed: {task.__name__} - {e}")
         for _ in range(300):
             if shutdown_flag:
                 break